@@ -3,7 +3,8 @@ from .models import Audiobook, AudiobookFile
 
 @admin.register(Audiobook)
 class AudiobookAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "author")   # customize fields as needed
+    list_display = ("id", "title", "author", "pipeline_status", "high_priority")   # customize fields as needed
+    list_editable = ("high_priority",)  # bumps a book up the transcription queue from its next run on
 
 @admin.register(AudiobookFile)
 class AudiobookFileAdmin(admin.ModelAdmin):
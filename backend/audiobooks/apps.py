@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AudiobooksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'audiobooks'
+
+    def ready(self):
+        from . import signals  # noqa: F401  response cache invalidation
@@ -0,0 +1,124 @@
+"""
+Streaming audio decoding and encoding through ffmpeg subprocesses.
+
+Audio is never held in memory as a whole: ffmpeg decodes the source into
+16 kHz mono PCM on a pipe that is read one bounded chunk at a time, and
+encoders take PCM on their stdin. Pipe buffers give natural backpressure, so
+peak memory per task stays the same for a 5-minute or a 10-hour file.
+"""
+import os
+import json
+import subprocess
+import tempfile
+
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("FFPROBE_BINARY", "ffprobe")
+
+PCM_SAMPLE_RATE = int(os.environ.get("TRANSCRIBE_SAMPLE_RATE", 16000))  # transcription models work on 16 kHz mono
+PCM_SAMPLE_WIDTH = 2  # signed 16-bit little-endian
+PCM_CHUNK_BYTES = PCM_SAMPLE_RATE * PCM_SAMPLE_WIDTH  # one second of audio per read
+
+
+class FFmpegError(Exception):
+    """Raised when an ffmpeg or ffprobe process fails."""
+    pass
+
+
+def pcm_bytes(seconds):
+    """Byte offset of `seconds` into the PCM stream, aligned to a whole sample."""
+    return int(round(seconds * PCM_SAMPLE_RATE)) * PCM_SAMPLE_WIDTH
+
+
+def decode_pcm(path, chunk_bytes=PCM_CHUNK_BYTES):
+    """
+    Yield the audio of `path` as 16 kHz mono PCM chunks of `chunk_bytes` (the last may be shorter).
+    Raises FFmpegError if ffmpeg cannot decode the file.
+    """
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            [FFMPEG_BINARY, "-nostdin", "-v", "error", "-i", path,
+             "-f", "s16le", "-ac", "1", "-ar", str(PCM_SAMPLE_RATE), "pipe:1"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+        )
+        try:
+            while True:
+                chunk = process.stdout.read(chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+            process.stdout.close()
+            _check(process, stderr, f"decoding {path}")
+        finally:
+            if process.poll() is None:
+                process.kill()  # consumer stopped early or failed
+                process.wait()
+
+
+class PcmEncoder:
+    """An ffmpeg process that encodes the 16 kHz mono PCM written to it into `path`."""
+
+    def __init__(self, path, codec_args):
+        self.path = path
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [FFMPEG_BINARY, "-nostdin", "-v", "error", "-y",
+             "-f", "s16le", "-ac", "1", "-ar", str(PCM_SAMPLE_RATE), "-i", "pipe:0",
+             *codec_args, path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr,
+        )
+
+    def write(self, data):
+        self.process.stdin.write(data)
+
+    def close(self):
+        """Flush the remaining input, wait for the encoder and raise if it failed."""
+        try:
+            self.process.stdin.close()
+            _check(self.process, self._stderr, f"encoding {self.path}")
+        finally:
+            self._stderr.close()
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self._stderr.close()
+
+
+def probe_audio(path, data=None):
+    """
+    Return {"duration", "bit_rate", "sample_rate", "channels", "codec"} of the first audio stream
+    of `path`, read by ffprobe from the container and frame headers without decoding audio.
+    If `data` is given it is piped to ffprobe instead, and `path` is only used in errors.
+    """
+    result = subprocess.run(
+        [FFPROBE_BINARY, "-v", "error", "-select_streams", "a:0", "-print_format", "json",
+         "-show_entries", "format=duration,bit_rate:stream=codec_name,sample_rate,channels,bit_rate",
+         "pipe:0" if data is not None else path],
+        input=data,
+        capture_output=True,
+    )
+    if result.returncode:
+        raise FFmpegError(f"ffprobe failed on {path}: {result.stderr.decode('utf-8', 'replace').strip()}")
+    info = json.loads(result.stdout or b"{}")
+    container = info.get("format", {})
+    stream = (info.get("streams") or [{}])[0]
+    return {
+        "duration": float(container.get("duration") or 0),
+        "bit_rate": int(stream.get("bit_rate") or container.get("bit_rate") or 0),
+        "sample_rate": int(stream.get("sample_rate") or 0),
+        "channels": int(stream.get("channels") or 0),
+        "codec": stream.get("codec_name") or "",
+    }
+
+
+def _check(process, stderr, action):
+    returncode = process.wait()
+    if returncode:
+        stderr.seek(0)
+        message = stderr.read().decode("utf-8", "replace").strip()
+        raise FFmpegError(f"ffmpeg failed {action} (exit {returncode}): {message}")
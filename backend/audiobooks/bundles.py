@@ -0,0 +1,129 @@
+"""
+Single-file ZIP download of an audiobook: its audio parts in reading order, the
+transcript of each part and the whole-book transcript (as JSON, however stored).
+
+Blobs are relayed chunk by chunk from storage into a stored ZIP (see
+`zipstream`). The archive layout depends only on the entry names and blob sizes,
+so an ETag and a Content-Length exist before any audio is read, and the client
+can resume with a byte Range. Checkout hands out signed links, so browsers can
+download the ZIP natively instead of assembling it in the tab.
+"""
+import os
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core import signing
+from django.core.cache import cache
+
+from .downloads import iter_blob
+from .transcript_store import iter_transcript, transcript_size
+from .zipstream import ZipArchive, ZipEntry
+
+BUNDLE_SIZE_WORKERS = 8
+BLOB_SIZE_CACHE_SECONDS = 30 * 24 * 3600  # blob names are unique, so their size never changes
+BUNDLE_LINK_SECONDS = int(os.environ.get("BUNDLE_LINK_SECONDS", 3600))  # signed download links handed out at checkout
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def audiobook_archive(audiobook):
+    """Return the ZipArchive for `audiobook`; `audiobook.audio_files` should be prefetched in order."""
+    folder = safe_filename(audiobook.title) or str(audiobook.id)
+    files = []  # (entry name, field file, modified, owner if it is a compressed transcript)
+    for file_obj in audiobook.audio_files.all():
+        number = f"{file_obj.order + 1:03d}"
+        if file_obj.file:
+            files.append((f"{folder}/{number}_{_original_name(file_obj.file.name)}", file_obj.file, file_obj.created_at, None))
+        if file_obj.transcription_file:
+            files.append((f"{folder}/transcripts/{number}.json", file_obj.transcription_file, file_obj.created_at, _compressed(file_obj)))
+    if audiobook.transcription_file:
+        files.append((f"{folder}/transcript.json", audiobook.transcription_file, audiobook.created_at, _compressed(audiobook)))
+
+    # Compressed transcripts go into the ZIP as the JSON they hold, whose size their index already knows
+    sizes = blob_sizes([field_file for _, field_file, _, owner in files if owner is None])
+    return ZipArchive([
+        ZipEntry(name, transcript_size(owner), modified, _transcript_reader(owner), cache_key=field_file.name) if owner
+        else ZipEntry(name, sizes[field_file.name], modified, _reader(field_file), cache_key=field_file.name)
+        for name, field_file, modified, owner in files
+    ])
+
+
+def bundle_token(audiobook_id):
+    """Token that lets a plain browser download (no Authorization header) fetch one audiobook's ZIP."""
+    return signing.TimestampSigner(salt="audiobook-bundle").sign(str(audiobook_id))
+
+
+def check_bundle_token(token, audiobook_id):
+    """True when `token` was issued for `audiobook_id` less than BUNDLE_LINK_SECONDS ago."""
+    try:
+        return signing.TimestampSigner(salt="audiobook-bundle").unsign(token, max_age=BUNDLE_LINK_SECONDS) == str(audiobook_id)
+    except signing.BadSignature:
+        return False
+
+
+def archive_etag(archive):
+    """Strong ETag of the archive bytes: the same entries and sizes always give the same layout."""
+    digest = hashlib.sha256()
+    for entry in archive.entries:
+        digest.update(f"{entry.name}\0{entry.cache_key}\0{entry.size}\n".encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range `Range: bytes=...` header into (start, end) with `end` exclusive.
+    Returns None when the whole body should be sent (no header, or multiple ranges)
+    and False when the range cannot be satisfied.
+    """
+    match = _RANGE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size  # suffix range: the last N bytes
+    else:
+        start, end = int(first), min(int(last) + 1, size) if last else size
+    if start >= end:
+        return False
+    return start, end
+
+
+def blob_sizes(field_files):
+    """Return {blob name: size}, asking storage in parallel only for sizes not cached yet."""
+    names = [field_file.name for field_file in field_files]
+    sizes = {key.split(":", 1)[1]: size for key, size in cache.get_many([f"blob-size:{name}" for name in names]).items()}
+    missing = [field_file for field_file in field_files if field_file.name not in sizes]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), BUNDLE_SIZE_WORKERS)) as pool:
+            fetched = dict(zip([f.name for f in missing], pool.map(lambda f: f.storage.size(f.name), missing)))
+        cache.set_many({f"blob-size:{name}": size for name, size in fetched.items()}, BLOB_SIZE_CACHE_SECONDS)
+        sizes.update(fetched)
+    return sizes
+
+
+def safe_filename(text):
+    """`text` without characters that are invalid in file names on common platforms."""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", text or "").strip(" ._")
+
+
+def _original_name(blob_name):
+    # Upload paths are "<audiobook>/audio/<uuid>_<original name>"
+    return os.path.basename(blob_name).split("_", 1)[-1]
+
+
+def _compressed(obj):
+    return obj if obj.transcription_index else None
+
+
+def _transcript_reader(obj):
+    def read(offset):
+        return iter_transcript(obj, offset)
+    return read
+
+
+def _reader(field_file):
+    def read(offset):
+        # Signed when the entry starts, so a long download never outlives its URL
+        return iter_blob(field_file.url, offset)
+    return read
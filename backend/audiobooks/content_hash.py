@@ -0,0 +1,21 @@
+"""
+Content hashing for audio files, used to recognise identical audio across
+re-uploads and editions so an existing transcription can be reused.
+"""
+import hashlib
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_chunks(chunks):
+    """Return the hex SHA-256 of an iterable of byte chunks (e.g. UploadedFile.chunks())."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_file(path):
+    """Return the hex SHA-256 of the file at `path`, reading it in bounded chunks."""
+    with open(path, "rb") as f:
+        return sha256_chunks(iter(lambda: f.read(HASH_CHUNK_SIZE), b""))
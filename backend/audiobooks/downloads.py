@@ -0,0 +1,147 @@
+"""
+Streaming download helpers used by the transcription pipeline and ZIP downloads.
+
+Blobs are written to disk in bounded chunks instead of being held in memory.
+Large blobs are fetched as parallel byte ranges, and partially downloaded data
+is kept in `<dest>.part*` files so a Celery retry resumes from the last good
+offset instead of starting over.
+"""
+import os
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .http_client import get_session
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get("DOWNLOAD_CHUNK_SIZE", 1024 * 1024))  # 1 MiB per read
+DOWNLOAD_PARALLEL_THRESHOLD = int(os.environ.get("DOWNLOAD_PARALLEL_THRESHOLD", 64 * 1024 * 1024))  # ranged fetch above 64 MiB
+DOWNLOAD_PARALLEL_WORKERS = int(os.environ.get("DOWNLOAD_PARALLEL_WORKERS", 4))
+DOWNLOAD_TIMEOUT = (10, 60)  # (connect, read) seconds
+
+
+def download_to_file(url, dest_path):
+    """
+    Download `url` to `dest_path` and return the path.
+    An existing `dest_path` is reused when its size matches the blob's, and replaced otherwise.
+    """
+    size, accepts_ranges = _probe(url)
+    if os.path.exists(dest_path):
+        try:
+            _check_size(dest_path, size)
+            logger.info(f"Reusing completed download at {dest_path}")
+            return dest_path
+        except IOError as e:
+            logger.warning(f"{e}, downloading it again")
+
+    if accepts_ranges and size and size >= DOWNLOAD_PARALLEL_THRESHOLD and DOWNLOAD_PARALLEL_WORKERS > 1:
+        _download_ranges(url, dest_path, size)
+    else:
+        part_path = f"{dest_path}.part"
+        _fetch_range(url, part_path, resume=accepts_ranges)
+        _check_size(part_path, size)
+        os.replace(part_path, dest_path)
+
+    return dest_path
+
+
+def iter_blob(url, offset=0):
+    """Yield the body of `url` from byte `offset` in DOWNLOAD_CHUNK_SIZE chunks, never holding more than one."""
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    r = get_session().get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+    try:
+        r.raise_for_status()
+        skip = offset if offset and r.status_code != 206 else 0  # Range ignored, drop the prefix ourselves
+        for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            if skip:
+                dropped = min(skip, len(chunk))
+                chunk, skip = chunk[dropped:], skip - dropped
+            if chunk:
+                yield chunk
+    finally:
+        r.close()
+
+
+def discard_partial_download(dest_path):
+    """Remove any `.part*` leftovers for `dest_path` once no retry will use them."""
+    directory, name = os.path.split(dest_path)
+    for entry in os.listdir(directory or "."):
+        if entry.startswith(f"{name}.part"):
+            os.remove(os.path.join(directory, entry))
+
+
+def _probe(url):
+    """Return (content_length, accepts_ranges) for `url`, or (None, False) if unknown."""
+    r = get_session().head(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+    r.raise_for_status()
+    try:
+        size = int(r.headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        size = None
+    accepts_ranges = r.headers.get("Accept-Ranges") == "bytes"
+    return size, accepts_ranges
+
+
+def _fetch_range(url, part_path, start=0, end=None, resume=True):
+    """
+    Stream bytes `start`..`end` (inclusive, open-ended if None) of `url` into `part_path`.
+    Bytes already present in `part_path` are skipped when `resume` is set.
+    """
+    offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+    if end is not None and start + offset > end:
+        return  # this range finished in an earlier attempt
+
+    headers = {}
+    if offset or start or end is not None:
+        headers["Range"] = f"bytes={start + offset}-{'' if end is None else end}"
+
+    r = get_session().get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+    try:
+        r.raise_for_status()
+        if offset and r.status_code != 206:
+            # Server ignored the Range header and is sending the whole body again
+            logger.warning(f"Range request ignored for {part_path}, restarting download")
+            offset = 0
+        elif offset:
+            logger.info(f"Resuming {part_path} from byte {start + offset}")
+
+        with open(part_path, "ab" if offset else "wb") as f:
+            for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+    finally:
+        r.close()
+
+
+def _download_ranges(url, dest_path, size):
+    """Fetch `size` bytes of `url` as parallel ranges and join them into `dest_path`."""
+    span = -(-size // DOWNLOAD_PARALLEL_WORKERS)  # ceil division
+    parts = [
+        (f"{dest_path}.part{i}", start, min(start + span, size) - 1)
+        for i, start in enumerate(range(0, size, span))
+    ]
+    logger.info(f"Downloading {size} bytes in {len(parts)} ranges to {dest_path}")
+
+    with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+        futures = [pool.submit(_fetch_range, url, path, start, end) for path, start, end in parts]
+        for future in futures:
+            future.result()  # re-raise the first failure; finished ranges stay on disk
+
+    joined_path = f"{dest_path}.part"
+    with open(joined_path, "wb") as out:
+        for path, start, end in parts:
+            _check_size(path, end - start + 1)
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out, DOWNLOAD_CHUNK_SIZE)
+    os.replace(joined_path, dest_path)
+
+    for path, _, _ in parts:
+        os.remove(path)
+
+
+def _check_size(path, expected):
+    if expected is not None and os.path.getsize(path) != expected:
+        actual = os.path.getsize(path)
+        os.remove(path)  # corrupt, do not resume from it
+        raise IOError(f"Incomplete download for {path}: got {actual} of {expected} bytes")
@@ -0,0 +1,98 @@
+"""
+Compact encoding of audio before it is uploaded for transcription.
+
+Transcription models work on 16 kHz mono speech, so shipping full-rate stereo
+PCM only inflates upload time and egress. The decoded 16 kHz mono PCM stream is
+cut into transcription windows and each window is encoded, while streaming, in
+the format that suits the configured transcription backend.
+"""
+import os
+import logging
+
+from .audio_stream import PCM_SAMPLE_RATE, PCM_SAMPLE_WIDTH, PcmEncoder, pcm_bytes
+
+logger = logging.getLogger(__name__)
+
+# Encoder settings per upload format, passed straight through to ffmpeg
+ENCODINGS = {
+    "flac": {"suffix": ".flac", "mime": "audio/flac", "args": ["-c:a", "flac"]},
+    "opus": {"suffix": ".ogg", "mime": "audio/ogg", "args": ["-c:a", "libopus", "-b:a", "24k"]},
+    "mp3": {"suffix": ".mp3", "mime": "audio/mpeg", "args": ["-c:a", "libmp3lame", "-b:a", "32k"]},
+    "wav": {"suffix": ".wav", "mime": "audio/wav", "args": ["-c:a", "pcm_s16le"]},
+}
+
+# Default upload format per transcription model; anything unlisted gets lossless FLAC
+BACKEND_ENCODINGS = {
+    "gpt-4o-transcribe": "flac",
+    "gpt-4o-mini-transcribe": "flac",
+    "whisper": "mp3",  # 25 MB request cap, so favour the smallest output
+    "whisper-1": "mp3",
+}
+
+
+def encoding_for_model(model):
+    """Return the upload format name for `model`, honouring a TRANSCRIBE_AUDIO_FORMAT override."""
+    name = os.environ.get("TRANSCRIBE_AUDIO_FORMAT") or BACKEND_ENCODINGS.get(model, "flac")
+    if name not in ENCODINGS:
+        raise ValueError(f"Unsupported transcription audio format: {name}")
+    return name
+
+
+def encode_windows(pcm_chunks, windows, dest_base, model, source_bytes_per_second):
+    """
+    Encode the (start, end) second `windows` of a 16 kHz mono PCM stream, one file per window
+    next to `dest_base`. Overlapping windows are fed from the same pass over the stream.
+    Yields (index, path, mime_type, bytes_saved) as each window is finished, where
+    `bytes_saved` is measured against the full-rate WAV the pipeline used to upload; only the
+    audio not already counted for the previous window is credited, so the values sum to the
+    saving of the whole file. Windows the stream ends before are skipped.
+    """
+    encoding = ENCODINGS[encoding_for_model(model)]
+    bounds = [(pcm_bytes(start), pcm_bytes(end)) for start, end in windows]
+    encoders = {}
+    counted = 0  # PCM bytes already credited to an earlier window
+
+    def finish(index, position):
+        nonlocal counted
+        encoder = encoders.pop(index)
+        encoder.close()
+        start, end = bounds[index][0], min(bounds[index][1], position)
+        seconds = (end - max(start, counted)) / (PCM_SAMPLE_RATE * PCM_SAMPLE_WIDTH)
+        counted = end
+        bytes_saved = int(seconds * source_bytes_per_second) - os.path.getsize(encoder.path)
+        logger.info(f"Encoded {encoder.path} with {encoding['args'][1]}: {bytes_saved} bytes smaller than WAV")
+        return index, encoder.path, encoding["mime"], bytes_saved
+
+    try:
+        position = 0
+        first_open = 0
+        for chunk in pcm_chunks:
+            chunk_end = position + len(chunk)
+            index = first_open
+            while index < len(bounds) and bounds[index][0] < chunk_end:
+                start, end = bounds[index]
+                if end > position:
+                    if index not in encoders:
+                        encoders[index] = PcmEncoder(_window_path(dest_base, index, encoding), encoding["args"])
+                    encoders[index].write(chunk[max(start - position, 0):min(end, chunk_end) - position])
+                index += 1
+            position = chunk_end
+
+            while first_open < len(bounds) and bounds[first_open][1] <= position:
+                yield finish(first_open, position)
+                first_open += 1
+
+        # The stream can end short of the planned duration (VBR headers overestimate it), so the
+        # last windows may be partly filled or never reached; an empty one is not worth uploading
+        for index in range(first_open, len(bounds)):
+            if index in encoders:
+                yield finish(index, position)
+            else:
+                logger.info(f"Skipping window {index} of {dest_base}: the audio ends at {position} PCM bytes")
+    finally:
+        for encoder in encoders.values():
+            encoder.kill()
+
+
+def _window_path(dest_base, index, encoding):
+    return f"{dest_base}_{index:04d}{encoding['suffix']}"
@@ -0,0 +1,79 @@
+"""
+Shared, pooled HTTP client for AI endpoint and blob storage calls.
+
+Each worker process keeps one keep-alive `requests.Session`, so repeated calls
+to Azure reuse TLS connections instead of handshaking per request. Every request
+gets explicit connect/read timeouts, and transient failures (connection errors,
+429 and 5xx responses) are retried with backoff, honouring `Retry-After`. AI
+calls are POSTs and billed, so they are only resent when refused (429/503).
+"""
+import os
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 10))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 300))  # transcribing a long window can take minutes
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 32))  # per host; one per thread of the network worker (-c 32)
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+POST_RETRY_STATUS_CODES = (429, 503)  # refused before any work was done
+
+_session = None
+_session_pid = None
+
+
+class PostSafeRetry(Retry):
+    """
+    Retry that resends a POST only when the server refused it with 429 or 503. A POST that
+    timed out or lost its connection is not resent: the AI service may already be working
+    on (and billing) it, and the Celery task's own retries decide whether to try again.
+    """
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method == "POST":
+            return bool(self.total) and status_code in POST_RETRY_STATUS_CODES
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies the default (connect, read) timeout to requests that set none."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+def get_session():
+    """
+    Return this process's shared session, building it on first use.
+    Celery's prefork pool forks workers after import, so the pid check makes each
+    child open its own connection pool instead of sharing the parent's sockets.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        _session = _build_session()
+        _session_pid = os.getpid()
+    return _session
+
+
+def _build_session():
+    retry = PostSafeRetry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=1,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD"}),  # read errors are retried for these only; POSTs see PostSafeRetry
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the final response to raise_for_status() in the caller
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+
+    session = TimeoutSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    logger.info(f"Created pooled HTTP session for process {os.getpid()}")
+    return session
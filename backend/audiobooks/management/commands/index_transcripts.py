@@ -0,0 +1,42 @@
+"""
+Index the transcripts saved before search inside books existed.
+
+    python manage.py index_transcripts [--audiobook <id>] [--reindex]
+
+New transcripts are indexed when they are saved. This command reads the stored
+transcript JSON of every transcribed part that has no indexed passages yet, or
+of every transcribed part with --reindex.
+"""
+from django.core.management.base import BaseCommand
+
+from audiobooks.models import AudiobookFile
+from audiobooks.transcript_index import index_transcript
+from audiobooks.transcript_store import load_transcript
+
+
+class Command(BaseCommand):
+    help = "Write transcript passages of already transcribed parts to the search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--audiobook", help="Only index the parts of this audiobook.")
+        parser.add_argument("--reindex", action="store_true", help="Also re-index parts that already have passages.")
+
+    def handle(self, *args, **options):
+        files = AudiobookFile.objects.exclude(transcription_file="").exclude(transcription_file__isnull=True)
+        if options["audiobook"]:
+            files = files.filter(audiobook_id=options["audiobook"])
+        if not options["reindex"]:
+            files = files.filter(transcript_segments__isnull=True)
+
+        indexed = failed = 0
+        for file_obj in files.distinct().iterator():
+            try:
+                passages = index_transcript(file_obj, load_transcript(file_obj))
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f"AudiobookFile {file_obj.id}: {e}")
+                continue
+            indexed += 1
+            self.stdout.write(f"AudiobookFile {file_obj.id}: {passages} passage(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} part(s), {failed} failed."))
@@ -0,0 +1,196 @@
+"""
+Bulk ingest of a publisher catalogue.
+
+    python manage.py ingest_catalogue catalogue.csv --root /mnt/publisher --workers 16
+
+The manifest is a CSV or JSON list of books with the columns/keys
+title, author, price, description, tags, high_priority, cover and parts, plus an
+optional id that identifies the book across runs (defaults to author/title).
+In CSV, `parts` is a "|"-separated list. Paths are relative to --root, which
+defaults to the manifest's directory.
+
+Books are handled in batches: the files of a batch are uploaded in parallel,
+its rows are created with bulk_create, its pipelines are enqueued as one
+Celery group and then the batch is recorded in the checkpoint file. A rerun
+skips every book in the checkpoint, so an interrupted ingest resumes with the
+first unfinished batch.
+"""
+import os
+import csv
+import json
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import group
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from audiobooks.models import Audiobook, AudiobookFile, cover_upload_path, audio_upload_path
+from audiobooks.tasks import build_audiobook_pipeline
+from audiobooks.content_hash import sha256_file
+from audiobooks.metadata import probe_metadata
+from audiobooks.response_cache import invalidate_audiobook
+from audiobooks.tags import set_tags
+
+INGEST_NAMESPACE = uuid.UUID("6f1c3f5e-8a43-4c1e-9f5e-0d6b1f2a9c47")  # stable Audiobook ids from manifest ids
+
+
+class Command(BaseCommand):
+    help = "Ingest a catalogue of audiobooks from a CSV or JSON manifest and a directory of files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("manifest", help="Path to the CSV or JSON manifest.")
+        parser.add_argument("--root", help="Directory the manifest paths are relative to (default: the manifest's directory).")
+        parser.add_argument("--workers", type=int, default=8, help="Parallel uploads (default: 8).")
+        parser.add_argument("--batch-size", type=int, default=50, help="Books created and enqueued together (default: 50).")
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <manifest>.checkpoint.json).")
+
+    def handle(self, *args, **options):
+        manifest = options["manifest"]
+        root = options["root"] or os.path.dirname(os.path.abspath(manifest))
+        checkpoint_path = options["checkpoint"] or f"{manifest}.checkpoint.json"
+        batch_size = max(options["batch_size"], 1)
+
+        books = self.validate(self.read_manifest(manifest), root)
+        done = self.read_checkpoint(checkpoint_path)
+        pending = [book for book in books if book["key"] not in done]
+        self.stdout.write(f"{len(books)} books in manifest, {len(books) - len(pending)} already ingested, {len(pending)} to go.")
+
+        self.started = time.monotonic()
+        self.uploaded_bytes = 0
+        self.ingested_books = 0
+        self.ingested_parts = 0
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as pool:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                self.ingest_batch(batch, pool)
+                done.update(book["key"] for book in batch)
+                self.write_checkpoint(checkpoint_path, done)
+                self.report(len(pending))
+
+        self.stdout.write(self.style.SUCCESS(f"Ingested {self.ingested_books} books ({self.ingested_parts} parts)."))
+
+    def read_manifest(self, manifest):
+        try:
+            with open(manifest, newline="", encoding="utf-8") as f:
+                if manifest.lower().endswith(".json"):
+                    rows = json.load(f)
+                    return rows.get("books", []) if isinstance(rows, dict) else rows
+                rows = list(csv.DictReader(f))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read manifest {manifest}: {e}")
+
+        for row in rows:
+            row["parts"] = [p.strip() for p in (row.get("parts") or "").split("|") if p.strip()]
+        return rows
+
+    def validate(self, rows, root):
+        """Check every book before uploading anything, and resolve its paths and stable id."""
+        books, errors = [], []
+        for line, row in enumerate(rows, start=1):
+            title, author = (row.get("title") or "").strip(), (row.get("author") or "").strip()
+            key = str(row.get("id") or f"{author}/{title}")
+            paths = [os.path.join(root, p) for p in [row.get("cover") or ""] + list(row.get("parts") or [])]
+            missing = [p for p in paths if not os.path.isfile(p)]
+            try:
+                price = Decimal(str(row["price"])) if row.get("price") not in (None, "") else None
+            except InvalidOperation:
+                price = None
+                errors.append(f"Book {line}: invalid price {row['price']!r}")
+
+            if not title or not author or not row.get("cover") or not row.get("parts"):
+                errors.append(f"Book {line}: title, author, cover and parts are required")
+            elif missing:
+                errors.append(f"Book {line} ({title}): missing {', '.join(missing)}")
+            else:
+                books.append({
+                    "key": key,
+                    "id": uuid.uuid5(INGEST_NAMESPACE, key),
+                    "title": title,
+                    "author": author,
+                    "price": price,
+                    "description": row.get("description") or "",
+                    "tags": row.get("tags") or "",
+                    "high_priority": str(row.get("high_priority", "")).lower() in ("true", "1"),
+                    "cover": paths[0],
+                    "parts": paths[1:],
+                })
+
+        if errors:
+            raise CommandError("Manifest has errors:\n" + "\n".join(errors))
+        return books
+
+    def ingest_batch(self, batch, pool):
+        # Books created by an earlier run that stopped before its checkpoint only need enqueueing
+        existing = set(Audiobook.objects.filter(id__in=[book["id"] for book in batch]).values_list("id", flat=True))
+        new_books = [book for book in batch if book["id"] not in existing]
+
+        audiobooks, files = [], []
+        for book in new_books:
+            audiobook = Audiobook(
+                id=book["id"], title=book["title"], author=book["author"], price=book["price"],
+                description=book["description"], tags=book["tags"], high_priority=book["high_priority"],
+                pipeline_status='TRANSCRIBING',
+            )
+            audiobooks.append((audiobook, book["cover"]))
+            for order, path in enumerate(book["parts"]):
+                files.append((AudiobookFile(audiobook=audiobook, order=order), path))
+
+        # Upload covers and parts in parallel; parts are hashed and probed locally on the way
+        list(pool.map(lambda item: self.upload(*item, field="cover_image"), audiobooks))
+        list(pool.map(lambda item: self.upload(*item, field="file"), files))
+
+        with transaction.atomic():
+            Audiobook.objects.bulk_create([audiobook for audiobook, _ in audiobooks])
+            AudiobookFile.objects.bulk_create([file_obj for file_obj, _ in files])
+            for audiobook, _ in audiobooks:
+                set_tags(audiobook, audiobook.tags)
+
+        batch_books = Audiobook.objects.filter(id__in=[book["id"] for book in batch])
+        batch_books.update(pipeline_status='TRANSCRIBING')
+        for book in batch:
+            invalidate_audiobook(book["id"])  # bulk_create and update() send no save signals
+        group([build_audiobook_pipeline(audiobook) for audiobook in batch_books]).apply_async()
+
+        self.ingested_books += len(batch)
+        self.ingested_parts += len(files)
+        self.uploaded_bytes += sum(os.path.getsize(path) for _, path in audiobooks + files)
+
+    def upload(self, instance, path, field):
+        """Upload `path` to the storage of `instance.<field>` under the usual upload path."""
+        file_field = instance._meta.get_field(field)
+        if isinstance(instance, AudiobookFile):
+            name = audio_upload_path(instance, os.path.basename(path))
+            instance.content_hash = sha256_file(path)
+            for metadata_field, value in probe_metadata(path).items():
+                setattr(instance, metadata_field, value)
+        else:
+            name = cover_upload_path(instance, os.path.basename(path))
+
+        with open(path, "rb") as f:
+            setattr(instance, field, file_field.storage.save(name, File(f)))
+
+    def report(self, total):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = self.ingested_books / elapsed
+        remaining = (total - self.ingested_books) / rate if rate else 0
+        self.stdout.write(
+            f"[{self.ingested_books}/{total} books] {self.ingested_parts} parts, "
+            f"{self.uploaded_bytes / 1024 ** 3:.2f} GiB at {self.uploaded_bytes / 1024 ** 2 / elapsed:.1f} MiB/s, "
+            f"{rate * 60:.1f} books/min, ETA {remaining / 60:.0f} min"
+        )
+
+    def read_checkpoint(self, path):
+        if not os.path.exists(path):
+            return set()
+        with open(path, encoding="utf-8") as f:
+            return set(json.load(f).get("done", []))
+
+    def write_checkpoint(self, path, done):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(done)}, f)
+        os.replace(tmp_path, path)  # never leave a half-written checkpoint behind
@@ -0,0 +1,41 @@
+"""
+Header-only audio metadata for AudiobookFile.
+
+Duration, bitrate, sample rate, channels and codec are read by ffprobe from the
+container and frame headers when a part is uploaded, so the pipeline and the
+catalogue know them without downloading or decoding the audio.
+"""
+import logging
+
+from .audio_stream import FFmpegError, probe_audio
+
+logger = logging.getLogger(__name__)
+
+METADATA_FIELDS = ["duration_seconds", "bit_rate", "sample_rate", "channels", "codec"]
+
+
+def probe_metadata(path, data=None):
+    """
+    Return AudiobookFile metadata field values for the audio at `path` (or in `data`).
+    Unreadable audio yields an empty dict; the upload still succeeds and the fields stay unset.
+    """
+    try:
+        info = probe_audio(path, data=data)
+    except (FFmpegError, OSError, ValueError) as e:
+        logger.warning(f"Could not read audio metadata of {path}: {e}")
+        return {}
+
+    return {
+        "duration_seconds": info["duration"] or None,
+        "bit_rate": info["bit_rate"] or None,
+        "sample_rate": info["sample_rate"] or None,
+        "channels": info["channels"] or None,
+        "codec": info["codec"],
+    }
+
+
+def probe_upload(uploaded_file):
+    """Metadata of an uploaded file, read from Django's temporary file when it spilled to disk."""
+    if hasattr(uploaded_file, "temporary_file_path"):
+        return probe_metadata(uploaded_file.temporary_file_path())
+    return probe_metadata(uploaded_file.name, data=b"".join(uploaded_file.chunks()))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0008_audiobookfile_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='upload_bytes_saved',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
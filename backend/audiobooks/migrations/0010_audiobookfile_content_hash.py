@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0009_audiobookfile_upload_bytes_saved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='transcription_model',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='audiobookfile',
+            index=models.Index(fields=['content_hash', 'transcription_model'], name='audiobooks__content_6f4ca2_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0010_audiobookfile_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='silence_trimmed_percent',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
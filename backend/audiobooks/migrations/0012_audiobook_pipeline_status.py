@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0011_audiobookfile_silence_trimmed_percent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobook',
+            name='pipeline_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('TRANSCRIBING', 'Transcribing'), ('SUMMARIZING', 'Summarizing'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0012_audiobook_pipeline_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobook',
+            name='high_priority',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0013_audiobook_high_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='summary',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='summary_source_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
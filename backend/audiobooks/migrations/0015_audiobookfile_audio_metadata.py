@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0014_audiobookfile_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='duration_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='bit_rate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='codec',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0015_audiobookfile_audio_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('parts', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('COMMITTED', 'Committed')], default='OPEN', max_length=20)),
+                ('audiobook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='audiobooks.audiobook')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0016_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audiobook',
+            index=models.Index(fields=['created_at', 'id'], name='audiobooks__created_ae5466_idx'),
+        ),
+    ]
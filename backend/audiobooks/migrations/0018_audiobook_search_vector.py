@@ -0,0 +1,68 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Keep search_vector in step with the searchable columns on every write path,
+# including bulk_create() and queryset.update(), which bypass Model.save().
+CREATE_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION audiobooks_audiobook_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.author, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.tags, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER audiobooks_audiobook_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, author, tags, description ON audiobooks_audiobook
+    FOR EACH ROW EXECUTE FUNCTION audiobooks_audiobook_search_vector();
+
+UPDATE audiobooks_audiobook SET title = title;
+
+CREATE INDEX audiobook_search_vector_gin ON audiobooks_audiobook USING gin (search_vector);
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP INDEX IF EXISTS audiobook_search_vector_gin;
+DROP TRIGGER IF EXISTS audiobooks_audiobook_search_vector_update ON audiobooks_audiobook;
+DROP FUNCTION IF EXISTS audiobooks_audiobook_search_vector();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":  # full-text search is Postgres-only
+        schema_editor.execute(CREATE_SEARCH_TRIGGER)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0017_audiobook_catalogue_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobook',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='audiobook',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='audiobook_search_vector_gin'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_trigger, drop_search_trigger),
+            ],
+        ),
+    ]
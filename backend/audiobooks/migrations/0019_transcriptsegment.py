@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+CREATE_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION audiobooks_transcriptsegment_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := to_tsvector('english', coalesce(NEW.text, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER audiobooks_transcriptsegment_search_vector_update
+    BEFORE INSERT OR UPDATE OF text ON audiobooks_transcriptsegment
+    FOR EACH ROW EXECUTE FUNCTION audiobooks_transcriptsegment_search_vector();
+
+CREATE INDEX transcript_search_vector_gin ON audiobooks_transcriptsegment USING gin (search_vector);
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP INDEX IF EXISTS transcript_search_vector_gin;
+DROP TRIGGER IF EXISTS audiobooks_transcriptsegment_search_vector_update ON audiobooks_transcriptsegment;
+DROP FUNCTION IF EXISTS audiobooks_transcriptsegment_search_vector();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":  # full-text search is Postgres-only
+        schema_editor.execute(CREATE_SEARCH_TRIGGER)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0018_audiobook_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('start', models.FloatField(blank=True, null=True)),
+                ('end', models.FloatField(blank=True, null=True)),
+                ('text', models.TextField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('audiobook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_segments', to='audiobooks.audiobook')),
+                ('audiobook_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_segments', to='audiobooks.audiobookfile')),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='transcriptsegment',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='transcript_search_vector_gin'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_trigger, drop_search_trigger),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0019_transcriptsegment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=60, unique=True)),
+                ('audiobook_count', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='audiobook',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='audiobooks', to='audiobooks.tag'),
+        ),
+    ]
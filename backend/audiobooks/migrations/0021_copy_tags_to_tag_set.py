@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Count
+from django.utils.text import slugify
+
+
+def copy_tags(apps, schema_editor):
+    """Turn every comma-separated `tags` string into Tag rows and links, then count the links."""
+    Audiobook = apps.get_model("audiobooks", "Audiobook")
+    Tag = apps.get_model("audiobooks", "Tag")
+    Link = Audiobook.tag_set.through
+
+    tag_ids = {}  # slug -> id
+    links = []
+    for audiobook_id, tags in Audiobook.objects.exclude(tags="").values_list("id", "tags").iterator():
+        linked = set()
+        for name in tags.split(","):
+            name = " ".join(name.split())[:50]
+            slug = slugify(name, allow_unicode=True)
+            if not slug or slug in linked:
+                continue
+            if slug not in tag_ids:
+                tag_ids[slug] = Tag.objects.get_or_create(slug=slug, defaults={"name": name})[0].id
+            linked.add(slug)
+            links.append(Link(audiobook_id=audiobook_id, tag_id=tag_ids[slug]))
+    Link.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+    for row in Link.objects.values("tag_id").annotate(n=Count("audiobook_id")):
+        Tag.objects.filter(id=row["tag_id"]).update(audiobook_count=row["n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0020_tag'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_tags, migrations.RunPython.noop),
+    ]
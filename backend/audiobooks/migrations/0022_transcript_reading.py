@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:54
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_segments(apps, schema_editor):
+    """Fill the passage counts of parts indexed before the count existed."""
+    AudiobookFile = apps.get_model("audiobooks", "AudiobookFile")
+    TranscriptSegment = apps.get_model("audiobooks", "TranscriptSegment")
+    for row in TranscriptSegment.objects.values("audiobook_file_id").annotate(n=Count("id")).order_by():
+        AudiobookFile.objects.filter(id=row["audiobook_file_id"]).update(transcript_segment_count=row["n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audiobooks', '0021_copy_tags_to_tag_set'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='transcript_segment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='transcriptsegment',
+            index=models.Index(fields=['audiobook_file', 'position'], name='audiobooks__audiobo_40a439_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transcriptsegment',
+            index=models.Index(fields=['audiobook_file', 'start'], name='audiobooks__audiobo_5fd895_idx'),
+        ),
+        migrations.RunPython(count_segments, migrations.RunPython.noop),
+    ]
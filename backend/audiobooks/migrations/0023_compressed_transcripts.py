@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:58
+
+import json
+import zlib
+import struct
+import logging
+
+from azure.core.exceptions import AzureError
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+FRAME_SIZE = 64 * 1024
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+
+
+def pack_transcript(transcript):
+    """The transcript_store format as of this migration: (blob bytes, offset index)."""
+    raw = json.dumps(transcript, ensure_ascii=False).encode("utf-8")
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    frames, blob = [], bytearray(GZIP_HEADER)
+    for offset in range(0, len(raw), FRAME_SIZE):
+        frames.append([offset, len(blob)])
+        blob += compressor.compress(raw[offset:offset + FRAME_SIZE])
+        blob += compressor.flush(zlib.Z_FULL_FLUSH)
+    blob += compressor.flush()
+    blob += struct.pack("<II", zlib.crc32(raw), len(raw) & 0xFFFFFFFF)
+    return bytes(blob), {"size": len(raw), "frames": frames}
+
+
+def compress_transcripts(apps, schema_editor):
+    """
+    Rewrite every plain JSON transcript blob in the compressed format, next to the old
+    blob, then delete the old one. Rows are updated one by one, so an interrupted run
+    resumes where it stopped; blobs that cannot be read stay plain and are still served.
+    """
+    for model_name in ("Audiobook", "AudiobookFile"):
+        model = apps.get_model("audiobooks", model_name)
+        rows = model.objects.filter(transcription_index__isnull=True).exclude(transcription_file="").exclude(transcription_file__isnull=True)
+        for obj in rows.iterator():
+            field_file = obj.transcription_file
+            try:
+                with field_file.open("rb") as f:
+                    blob, index = pack_transcript(json.load(f))
+                name = field_file.storage.save(f"{field_file.name.removesuffix('.json')}.json.gz", ContentFile(blob))
+            except (OSError, ValueError, AzureError) as e:
+                logger.error(f"Could not compress transcript of {model_name} {obj.pk}: {e}")
+                continue
+            model.objects.filter(pk=obj.pk).update(transcription_file=name, transcription_index=index)
+            try:
+                field_file.storage.delete(field_file.name)
+            except AzureError as e:
+                logger.warning(f"Could not delete the plain transcript {field_file.name}: {e}")  # row already points to the new blob
+
+
+class Migration(migrations.Migration):
+    atomic = False  # converted rows are kept even if a later blob fails
+
+    dependencies = [
+        ('audiobooks', '0022_transcript_reading'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiobook',
+            name='transcription_index',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiobookfile',
+            name='transcription_index',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_transcripts, migrations.RunPython.noop),
+    ]
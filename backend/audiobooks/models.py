@@ -1,16 +1,30 @@
 import uuid
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from .storages_backends import AzureAudiobookStorage
 
 def cover_upload_path(instance, filename):
     return f"{instance.id}/cover.jpg"
 
 def transcription_upload_path(instance, filename):
-    return f"{instance.audiobook.id}/transcription/{uuid.uuid4()}_{filename}"
+    # Used by both AudiobookFile (per part) and Audiobook (aggregated book transcript)
+    audiobook_id = instance.audiobook_id if isinstance(instance, AudiobookFile) else instance.id
+    return f"{audiobook_id}/transcription/{uuid.uuid4()}_{filename}"
 
 def audio_upload_path(instance, filename):
     return f"{instance.audiobook.id}/audio/{uuid.uuid4()}_{filename}"
 
+class Tag(models.Model):
+    """A normalized tag; `slug` is its identity, `audiobook_count` its precomputed facet count (see tags.py)."""
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=60, unique=True, allow_unicode=True)
+    audiobook_count = models.PositiveIntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Audiobook(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200)
@@ -20,9 +34,33 @@ class Audiobook(models.Model):
 
     cover_image = models.FileField(storage=AzureAudiobookStorage(), upload_to=cover_upload_path)
     transcription_file = models.FileField(storage=AzureAudiobookStorage(), upload_to=transcription_upload_path, blank=True, null=True)
-    tags = models.CharField(max_length=200, blank=True)  # Comma-separated tags
+    transcription_index = models.JSONField(blank=True, null=True)  # frame offsets of a compressed transcript; None for plain JSON (see transcript_store.py)
+    tags = models.CharField(max_length=200, blank=True)  # Comma-separated display copy of tag_set, written by tags.set_tags
+    tag_set = models.ManyToManyField(Tag, related_name="audiobooks", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Overall progress of the transcribe -> aggregate -> summarize pipeline
+    PIPELINE_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('TRANSCRIBING', 'Transcribing'),
+        ('SUMMARIZING', 'Summarizing'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+    pipeline_status = models.CharField(max_length=20, choices=PIPELINE_STATUS_CHOICES, default='PENDING')
+    # Set by admins to jump the transcription queue. Read when the pipeline is queued, so changing it
+    # later does not reorder parts already waiting; it applies the next time the book is transcribed.
+    high_priority = models.BooleanField(default=False)
+
+    # Weighted title/author/tags/description lexemes, kept current by a database trigger (see search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"]),  # catalogue keyset pagination
+            GinIndex(fields=["search_vector"], name="audiobook_search_vector_gin"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -33,6 +71,7 @@ class AudiobookFile(models.Model):
     file = models.FileField(storage=AzureAudiobookStorage(), upload_to=audio_upload_path)
     order = models.PositiveIntegerField(default=0)
     transcription_file = models.FileField(storage=AzureAudiobookStorage(), upload_to=transcription_upload_path, blank=True, null=True)
+    transcription_index = models.JSONField(blank=True, null=True)  # frame offsets of a compressed transcript; None for plain JSON
     created_at = models.DateTimeField(auto_now_add=True)
 
     STATUS_CHOICES = [
@@ -42,12 +81,74 @@ class AudiobookFile(models.Model):
         ('FAILED', 'Failed'),
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    upload_bytes_saved = models.BigIntegerField(blank=True, null=True)  # vs. full-rate WAV upload for transcription
+    silence_trimmed_percent = models.FloatField(blank=True, null=True)  # share of audio dropped by silence trimming
+    transcript_segment_count = models.PositiveIntegerField(default=0)  # indexed TranscriptSegment rows, for readers
+
+    # Read from the audio headers at upload time (see metadata.py)
+    duration_seconds = models.FloatField(blank=True, null=True)
+    bit_rate = models.PositiveIntegerField(blank=True, null=True)  # bits per second
+    sample_rate = models.PositiveIntegerField(blank=True, null=True)  # Hz
+    channels = models.PositiveSmallIntegerField(blank=True, null=True)
+    codec = models.CharField(max_length=32, blank=True)
+
+    # Transcription cache key: identical audio transcribed by the same model is reused
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the audio bytes
+    transcription_model = models.CharField(max_length=100, blank=True)
+
+    # Cached map-step summary of this part's transcript, reused until the transcript changes
+    summary = models.TextField(blank=True)
+    summary_source_hash = models.CharField(max_length=64, blank=True)
 
 
     class Meta:
         ordering = ["order"]
+        indexes = [
+            models.Index(fields=["content_hash", "transcription_model"]),
+        ]
 
     def __str__(self):
         return f"{self.audiobook.title} - File {self.order}"
 
 
+
+
+class UploadSession(models.Model):
+    """Parts of an audiobook being uploaded straight to blob storage (see uploads.py)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    audiobook = models.ForeignKey(Audiobook, related_name="upload_sessions", on_delete=models.CASCADE)
+    # [{"index", "filename", "order", "size", "blob_name", "committed"}, ...]
+    parts = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    STATUS_CHOICES = [
+        ('OPEN', 'Open'),
+        ('COMMITTED', 'Committed'),
+    ]
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='OPEN')
+
+    def __str__(self):
+        return f"{self.audiobook.title} - Upload {self.id}"
+
+
+class TranscriptSegment(models.Model):
+    """One timestamped passage of a part's transcript, searchable without reading the blob (see transcript_index.py)."""
+    audiobook = models.ForeignKey(Audiobook, related_name="transcript_segments", on_delete=models.CASCADE)
+    audiobook_file = models.ForeignKey(AudiobookFile, related_name="transcript_segments", on_delete=models.CASCADE)
+    position = models.PositiveIntegerField()  # passage number within the part's transcript
+    start = models.FloatField(blank=True, null=True)  # seconds into the part; None if the transcript has no timestamps
+    end = models.FloatField(blank=True, null=True)
+    text = models.TextField()
+
+    # Lexemes of `text`, kept current by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["audiobook_file", "position"]),  # reading by page
+            models.Index(fields=["audiobook_file", "start"]),  # reading by time range
+            GinIndex(fields=["search_vector"], name="transcript_search_vector_gin"),
+        ]
+
+    def __str__(self):
+        return f"{self.audiobook_file} - Passage {self.position}"
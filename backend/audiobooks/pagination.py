@@ -0,0 +1,144 @@
+"""
+Pagination of the catalogue and of catalogue search.
+
+Pages are ordered newest first by (created_at, id). A cursor holds the key of
+the row it continues from, so fetching any page is an index range scan of one
+page of rows, however deep into the catalogue it is. OFFSET would scan and
+discard every earlier row, and a page count would need a full COUNT(*).
+"""
+import os
+import json
+import base64
+import uuid
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+CATALOGUE_PAGE_SIZE = int(os.environ.get("CATALOGUE_PAGE_SIZE", 24))
+CATALOGUE_MAX_PAGE_SIZE = 100
+SEARCH_MAX_PAGES = 50
+
+
+class CatalogueCursorPagination(BasePagination):
+    """
+    `?cursor=` continues from an opaque cursor taken from `next` or `previous`;
+    `?page_size=` picks the page size, up to CATALOGUE_MAX_PAGE_SIZE.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            reverse = False
+            rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        else:
+            reverse, created_at, pk = cursor
+            if reverse:
+                after = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                order = ("created_at", "id")
+            else:
+                after = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                order = self.ordering
+            rows = list(queryset.filter(after).order_by(*order)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        if reverse:
+            page.reverse()
+        # Coming from a cursor means there are rows on the side we came from
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else cursor is not None
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "previous": self.get_previous_link(), "results": data})
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_page_size(self, request):
+        return page_size(request, self.page_size_query_param)
+
+    def encode_cursor(self, row, reverse):
+        key = {"c": row.created_at.isoformat(), "i": str(row.id), "r": reverse}
+        token = base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+        params = self.request.query_params.copy()
+        params[self.cursor_query_param] = token
+        return self.request.build_absolute_uri(f"{self.request.path}?{params.urlencode()}")
+
+    def decode_cursor(self, request):
+        """Return (reverse, created_at, id) from the request's cursor, or None on the first page."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            key = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            created_at = parse_datetime(key["c"])
+            if created_at is None:
+                raise ValueError(key["c"])
+            return bool(key["r"]), created_at, uuid.UUID(key["i"])
+        except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+            raise NotFound("Invalid cursor.")
+
+
+class SearchPagination(BasePagination):
+    """
+    `?page=` (from 1) pages through ranked search results, `?page_size=` as for the catalogue.
+    A rank has no stable key to continue from, so pages are LIMIT/OFFSET. That stays cheap
+    because relevant results come first and pages stop at SEARCH_MAX_PAGES. No total is
+    counted, since counting would mean visiting every match.
+    """
+    page_query_param = "page"
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = page_size(request, self.page_size_query_param)
+        try:
+            self.number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound("Invalid page.")
+        if not 1 <= self.number <= SEARCH_MAX_PAGES:
+            raise NotFound("Invalid page.")
+
+        offset = (self.number - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size and self.number < SEARCH_MAX_PAGES
+        return rows[:self.page_size]
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.page_link(self.number + 1) if self.has_next else None,
+            "previous": self.page_link(self.number - 1) if self.number > 1 else None,
+            "results": data,
+        })
+
+    def page_link(self, number):
+        params = self.request.query_params.copy()
+        params[self.page_query_param] = number
+        return self.request.build_absolute_uri(f"{self.request.path}?{params.urlencode()}")
+
+
+def page_size(request, param):
+    try:
+        size = int(request.query_params.get(param, CATALOGUE_PAGE_SIZE))
+    except ValueError:
+        return CATALOGUE_PAGE_SIZE
+    return min(max(size, 1), CATALOGUE_MAX_PAGE_SIZE)
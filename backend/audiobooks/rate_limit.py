@@ -0,0 +1,128 @@
+"""
+Cluster-wide token-bucket rate limiting for the Azure AI endpoints.
+
+Every Celery worker draws from the same buckets in Redis (the Celery broker),
+so the fleet as a whole stays just under the deployment's quota instead of
+each worker bursting independently into 429s. Each endpoint has a
+requests-per-minute bucket and a units-per-minute bucket, where a unit is
+whatever the endpoint is metered on (audio seconds or tokens). Callers block
+until both buckets have capacity.
+"""
+import os
+import time
+import random
+import logging
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("RATE_LIMIT_MAX_WAIT", 600))  # give up (and let Celery retry) after this long
+RATE_LIMIT_MAX_SLEEP = 5.0  # re-check at least this often, other workers may release nothing but time passes
+
+# Atomically refill and check every bucket, and take from all of them only if all can pay.
+# KEYS are bucket keys; ARGV is (capacity, refill_per_second, cost) for each key.
+# Returns "0" when the cost was taken, otherwise the seconds to wait as a string.
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = math.min(tonumber(ARGV[i * 3]), capacity)
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+    levels[i] = tokens - cost
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', levels[i], 'ts', now)
+    redis.call('EXPIRE', key, 120)
+end
+return '0'
+"""
+
+_redis = None
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity did not free up within RATE_LIMIT_MAX_WAIT."""
+    pass
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_connect_timeout=2, socket_timeout=2)
+    return _redis
+
+
+class RateLimiter:
+    """
+    Shared limiter for one endpoint. `requests_per_minute` and `units_per_minute`
+    are the deployment's quota; a value of 0 leaves that dimension unlimited.
+    """
+
+    def __init__(self, name, requests_per_minute, units_per_minute):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.units_per_minute = units_per_minute
+
+    def _buckets(self, units):
+        buckets = []
+        if self.requests_per_minute:
+            buckets.append((f"ratelimit:{self.name}:requests", self.requests_per_minute, 1))
+        if self.units_per_minute:
+            buckets.append((f"ratelimit:{self.name}:units", self.units_per_minute, units))
+        return buckets
+
+    def acquire(self, units=0):
+        """Block until one request costing `units` fits under the quota."""
+        buckets = self._buckets(units)
+        if not buckets:
+            return
+
+        keys = [key for key, _, _ in buckets]
+        args = []
+        for _, per_minute, cost in buckets:
+            args += [per_minute, per_minute / 60, cost]
+
+        deadline = time.monotonic() + RATE_LIMIT_MAX_WAIT
+        while True:
+            try:
+                wait = float(get_redis().eval(TOKEN_BUCKET_SCRIPT, len(keys), *keys, *args))
+            except redis.RedisError as e:
+                # Never let the limiter itself take the pipeline down; the HTTP retry on 429 still applies
+                logger.warning(f"Rate limiter for {self.name} unavailable, continuing without it: {e}")
+                return
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(f"No {self.name} capacity within {RATE_LIMIT_MAX_WAIT}s")
+
+            logger.info(f"Waiting {wait:.1f}s for {self.name} capacity")
+            # Jitter keeps workers that were blocked together from all retrying at the same instant
+            time.sleep(min(wait, RATE_LIMIT_MAX_SLEEP) * random.uniform(1.0, 1.2))
+
+
+transcribe_limiter = RateLimiter(
+    "transcribe",
+    requests_per_minute=int(os.environ.get("AZURE_TRANSCRIBE_RPM", 0)),
+    units_per_minute=int(os.environ.get("AZURE_TRANSCRIBE_AUDIO_SECONDS_PER_MINUTE", 0)),
+)
+
+summarize_limiter = RateLimiter(
+    "summarize",
+    requests_per_minute=int(os.environ.get("AZURE_SUMMARIZE_RPM", 0)),
+    units_per_minute=int(os.environ.get("AZURE_SUMMARIZE_TPM", 0)),
+)
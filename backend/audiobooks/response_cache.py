@@ -0,0 +1,104 @@
+"""
+Cached catalogue responses with conditional GET.
+
+Catalogue list and search pages, book details and reads inside a book are
+cached as serialized data in the default (Redis) cache. Their keys contain a version token that is replaced
+whenever the data behind them changes. A change to an Audiobook replaces the
+catalogue token and that book's token; a change to an AudiobookFile replaces
+only the book's token, because list cards do not show files. Entries under old
+tokens are never read again and simply expire, so invalidation is one write
+and never needs to scan for keys.
+
+Cached data holds absolute URLs (page links, transcript links), so keys
+include the scheme and host: a render through an internal hostname, such as
+the Next.js server's, is never served to browsers.
+
+Every entry carries an ETag (a hash of its data) and the time it was rendered.
+These are sent as ETag and Last-Modified, so a client that already has the
+entry gets a 304 without a body.
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .signing import SIGNED_URL_REFRESH_MARGIN
+
+# Cached bodies contain signed URLs, so they must expire well before those URLs are due for refresh
+RESPONSE_CACHE_SECONDS = min(int(os.environ.get("RESPONSE_CACHE_SECONDS", 120)), SIGNED_URL_REFRESH_MARGIN // 2)
+# Version tokens only need to outlive the entries keyed by them; an expired token just means a miss
+RESPONSE_VERSION_SECONDS = 24 * 3600
+
+
+def catalogue_list_key(request):
+    """Cache key of a list or search page: the catalogue version plus the full URL (scheme and host included)."""
+    return f"response:catalogue:{_version('catalogue')}:{_hash(request.build_absolute_uri())}"
+
+
+def audiobook_detail_key(request, audiobook_id):
+    """Cache key of a book's detail, per scheme and host since the data holds absolute URLs."""
+    return f"response:audiobook:{audiobook_id}:{_version(f'audiobook:{audiobook_id}')}:{_hash(request.build_absolute_uri('/'))}"
+
+
+def audiobook_query_key(request, audiobook_id, name):
+    """
+    Cache key of a read inside one book (`name` tells them apart, e.g. search or a part's transcript).
+    Any change to the book's parts, and so to their transcripts, moves it.
+    """
+    return f"{audiobook_detail_key(request, audiobook_id)}:{name}:{_hash(request.query_params.urlencode())}"
+
+
+def invalidate_audiobook(audiobook_id, catalogue=True):
+    """
+    Drop cached responses of a book, and of the catalogue list unless `catalogue` is False.
+    Runs after the surrounding transaction commits, so no reader can cache the old rows
+    under the new version.
+    """
+    def replace_versions():
+        names = [f"audiobook:{audiobook_id}"] + (["catalogue"] if catalogue else [])
+        cache.set_many({f"response-version:{name}": uuid.uuid4().hex for name in names}, RESPONSE_VERSION_SECONDS)
+    transaction.on_commit(replace_versions)
+
+
+def cached_response(request, key, render):
+    """
+    Return the Response for `key`, calling `render()` for its data only on a cache miss,
+    or a 304 when the client's If-None-Match / If-Modified-Since still match it.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        data = render()
+        entry = {"data": data, "etag": _etag(data), "modified": int(time.time())}
+        cache.set(key, entry, RESPONSE_CACHE_SECONDS)
+
+    response = Response(entry["data"], headers={
+        "ETag": entry["etag"],
+        "Last-Modified": http_date(entry["modified"]),
+        "Cache-Control": "private, no-cache",  # per user, and always revalidated
+    })
+    return get_conditional_response(request, etag=entry["etag"], last_modified=entry["modified"], response=response)
+
+
+def _version(name):
+    key = f"response-version:{name}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, RESPONSE_VERSION_SECONDS)
+        version = cache.get(key)  # whichever process added it first wins
+    return version
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _etag(data):
+    body = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
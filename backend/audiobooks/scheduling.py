@@ -0,0 +1,29 @@
+"""
+Fair-share priorities for transcription work.
+
+Celery's Redis transport keeps one list per priority level and always drains
+the lower numbers first (0 is most urgent). Each part of a book is given a
+priority from its rank within that book, growing logarithmically: the first
+part of every book lands on the same level, the next two one level down, the
+next four another level down, and so on. A 150-part upload therefore no longer
+blocks other books. Their first parts jump ahead of its tail, while it still
+makes steady progress. Books marked high priority start two levels ahead.
+"""
+import math
+
+MAX_PRIORITY = 9  # lowest urgency level configured in CELERY_BROKER_TRANSPORT_OPTIONS
+NORMAL_PRIORITY_OFFSET = 2  # levels between a high-priority book and a normal one
+
+
+def part_priority(rank, high_priority=False):
+    """Return the broker priority for the part at `rank` (0-based, in play order) of a book."""
+    level = int(math.log2(rank + 1))
+    if not high_priority:
+        level += NORMAL_PRIORITY_OFFSET
+    return min(level, MAX_PRIORITY)
+
+
+def file_priority(file_obj):
+    """Broker priority for a single AudiobookFile, e.g. for the windows of a segmented part."""
+    rank = file_obj.audiobook.audio_files.filter(order__lt=file_obj.order).count()
+    return part_priority(rank, file_obj.audiobook.high_priority)
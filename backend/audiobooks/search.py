@@ -0,0 +1,31 @@
+"""
+Full-text catalogue search (Postgres).
+
+Every Audiobook row stores a `search_vector` of its title (weight A), author
+and tags (B) and description (C). A trigger installed by migration 0018 keeps
+it current, and a GIN index serves the match. A query only touches the
+matching rows, ranks them and returns the top page, instead of shipping the
+catalogue to the client.
+"""
+import os
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+SEARCH_CONFIG = "english"  # must match the text search config used by the trigger
+# Rank weight of D, C, B and A lexemes (Postgres order); a title hit outranks a description hit
+SEARCH_RANK_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+SEARCH_MAX_QUERY_LENGTH = int(os.environ.get("SEARCH_MAX_QUERY_LENGTH", 200))
+
+
+def search_catalogue(queryset, text):
+    """
+    Filter `queryset` to books matching `text` (web-search syntax: "quoted phrases", or, -exclude)
+    and order them by weighted rank, newest first among equals. Each book gets a `rank`.
+    """
+    query = SearchQuery(text[:SEARCH_MAX_QUERY_LENGTH], search_type="websearch", config=SEARCH_CONFIG)
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query, weights=SEARCH_RANK_WEIGHTS))
+        .order_by("-rank", "-created_at", "-id")
+    )
@@ -1,14 +1,40 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Audiobook, AudiobookFile
+from .models import Audiobook, AudiobookFile, UploadSession, TranscriptSegment, Tag
+from .uploads import UPLOAD_BLOCK_SIZE, upload_url, uploaded_blocks
+
+class TranscriptURLMixin:
+    """
+    Link a compressed transcript to its JSON view (`transcript_url_name`) instead of the gzip
+    blob, so `transcription_file` always serves JSON.
+    """
+    transcript_url_name = None
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.transcription_file and instance.transcription_index:
+            url = reverse(self.transcript_url_name, args=[instance.id])
+            request = self.context.get("request")
+            data["transcription_file"] = request.build_absolute_uri(url) if request else url
+        return data
+
+
+class AudiobookFileSerializer(TranscriptURLMixin, serializers.ModelSerializer):
+    transcript_url_name = "audiobook-file-transcript-json"
 
-class AudiobookFileSerializer(serializers.ModelSerializer):
     class Meta:
         model = AudiobookFile
-        fields = ["id", "file", "order", "transcription_file", "status", "created_at"]
+        fields = [
+            "id", "file", "order", "transcription_file", "status", "created_at",
+            "duration_seconds", "bit_rate", "sample_rate", "channels", "codec", "transcript_segment_count",
+        ]
+        read_only_fields = ["duration_seconds", "bit_rate", "sample_rate", "channels", "codec", "transcript_segment_count"]
 
 
-class AudiobookSerializer(serializers.ModelSerializer):
+class AudiobookSerializer(TranscriptURLMixin, serializers.ModelSerializer):
+    transcript_url_name = "audiobook-transcript-json"
     audio_files = AudiobookFileSerializer(many=True, read_only=True)
+    duration_seconds = serializers.SerializerMethodField()
 
     class Meta:
         model = Audiobook
@@ -22,6 +48,90 @@ class AudiobookSerializer(serializers.ModelSerializer):
             "tags",
             "created_at",
             "audio_files",
+            "duration_seconds",
             "transcription_file",
+            "pipeline_status",
+            "high_priority",
         ]
-        read_only_fields = ["id", "created_at"]
+        read_only_fields = ["id", "created_at", "pipeline_status", "high_priority"]  # priority is set by admins at upload or in the Django admin
+
+    def get_duration_seconds(self, obj):
+        """Total runtime from the parts' header metadata, or None while any part is unknown."""
+        durations = [f.duration_seconds for f in obj.audio_files.all()]
+        if not durations or None in durations:
+            return None
+        return round(sum(durations), 3)
+
+
+class AudiobookListSerializer(serializers.ModelSerializer):
+    """Catalogue card: the book's own columns only, so a page needs no per-book file queries or signing."""
+    class Meta:
+        model = Audiobook
+        fields = ["id", "title", "author", "price", "cover_image", "tags", "created_at", "pipeline_status"]
+        read_only_fields = fields
+
+
+class AudiobookSearchSerializer(AudiobookListSerializer):
+    """A catalogue card with its search rank."""
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(AudiobookListSerializer.Meta):
+        fields = AudiobookListSerializer.Meta.fields + ["rank"]
+        read_only_fields = fields
+
+
+class TagSerializer(serializers.ModelSerializer):
+    """A tag facet: filter the catalogue with ?tag=<slug>; `count` is precomputed."""
+    count = serializers.IntegerField(source="audiobook_count", read_only=True)
+
+    class Meta:
+        model = Tag
+        fields = ["name", "slug", "count"]
+        read_only_fields = fields
+
+
+class TranscriptPassageSerializer(serializers.ModelSerializer):
+    """A passage of a part's transcript and where it is heard (`start`/`end` seconds, None if untimed)."""
+    class Meta:
+        model = TranscriptSegment
+        fields = ["position", "start", "end", "text"]
+        read_only_fields = fields
+
+
+class TranscriptSegmentSerializer(TranscriptPassageSerializer):
+    """A matching passage: which part (`file_id`, `order`) and where in it."""
+    file_id = serializers.UUIDField(source="audiobook_file_id", read_only=True)
+    order = serializers.IntegerField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(TranscriptPassageSerializer.Meta):
+        fields = ["file_id", "order"] + TranscriptPassageSerializer.Meta.fields + ["rank"]
+        read_only_fields = fields
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    An upload session with a fresh write SAS URL for every part still to be committed.
+    With `include_blocks` in the context, each part also lists the blocks Azure already holds.
+    """
+    parts = serializers.SerializerMethodField()
+    block_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "audiobook", "status", "created_at", "block_size", "parts"]
+        read_only_fields = fields
+
+    def get_block_size(self, obj):
+        return UPLOAD_BLOCK_SIZE
+
+    def get_parts(self, obj):
+        parts = []
+        for part in obj.parts:
+            part = dict(part)
+            if not part["committed"]:
+                part["upload_url"], part["upload_url_expires_at"] = upload_url(part["blob_name"])
+                if self.context.get("include_blocks"):
+                    part["uploaded_blocks"] = uploaded_blocks(part["blob_name"])
+            parts.append(part)
+        return parts
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Audiobook, AudiobookFile
+from .response_cache import invalidate_audiobook
+from .tags import recount_tags
+
+
+@receiver([post_save, post_delete], sender=Audiobook)
+def audiobook_changed(sender, instance, **kwargs):
+    invalidate_audiobook(instance.id)
+
+
+@receiver([post_save, post_delete], sender=AudiobookFile)
+def audiobook_file_changed(sender, instance, **kwargs):
+    invalidate_audiobook(instance.audiobook_id, catalogue=False)  # list cards show no files
+
+
+@receiver(pre_delete, sender=Audiobook)
+def audiobook_deleting(sender, instance, **kwargs):
+    # Deleting the book drops its tag links without an m2m_changed signal, so recount afterwards
+    tag_ids = set(instance.tag_set.values_list("id", flat=True))
+    transaction.on_commit(lambda: recount_tags(tag_ids))
@@ -0,0 +1,119 @@
+"""
+Shared SAS URL signing for blob downloads and uploads.
+
+Signed URLs are cached per (blob, permission, lifetime) and handed out again
+until they come within SIGNED_URL_REFRESH_MARGIN of expiring. Expiry times are
+aligned to that margin, so every process signing the same blob in the same
+window produces the byte-identical URL, and CDNs and browsers can cache the
+download. With AZURE_SAS_USER_DELEGATION set, URLs are signed with a cached
+user delegation key (Azure AD) instead of the storage account key. Response
+header overrides (e.g. content_encoding) are signed into the URL, so storage
+serves the blob with those headers.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from urllib.parse import quote
+from datetime import datetime, timedelta, timezone
+
+from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
+
+logger = logging.getLogger(__name__)
+
+AZURE_STORAGE_ACCOUNT_NAME = os.environ.get("AZURE_ACCOUNT_NAME")
+AZURE_STORAGE_ACCOUNT_KEY = os.environ.get("AZURE_ACCOUNT_KEY")
+AZURE_CONTAINER_NAME = os.environ.get("AZURE_CONTAINER")
+
+AZURE_SAS_USER_DELEGATION = os.environ.get("AZURE_SAS_USER_DELEGATION", "False").lower() in ("true", "1", "t")
+SIGNED_URL_REFRESH_MARGIN = int(os.environ.get("SIGNED_URL_REFRESH_MARGIN", 300))  # seconds of validity a reused URL keeps at least
+SIGNED_URL_CACHE_SIZE = int(os.environ.get("SIGNED_URL_CACHE_SIZE", 10000))
+USER_DELEGATION_KEY_HOURS = 24
+
+_cache = {}  # (blob_name, permission, expires_in, headers) -> (url, expiry timestamp)
+_delegation_key = None  # (key, expiry timestamp)
+_lock = threading.Lock()
+
+
+def signed_url(blob_name, permission="r", expires_in=3600, **headers):
+    """
+    Return a SAS URL for `blob_name` with `permission` (e.g. "r", "cw") that stays valid
+    for roughly `expires_in` seconds, and for at least SIGNED_URL_REFRESH_MARGIN.
+    `headers` are response header overrides for generate_blob_sas (content_type,
+    content_encoding, content_disposition, ...).
+    """
+    return sign(blob_name, permission, expires_in, **headers)[0]
+
+
+def sign(blob_name, permission="r", expires_in=3600, **headers):
+    """Like `signed_url`, but return (url, expires_at) so callers can tell clients when to refresh."""
+    key = (blob_name, permission, expires_in, tuple(sorted(headers.items())))
+    now = time.time()
+    cached = _cache.get(key)
+    if not cached or cached[1] - now <= SIGNED_URL_REFRESH_MARGIN:
+        # Round the expiry up to the margin so concurrent signers agree on it
+        expiry = math.ceil((now + expires_in) / SIGNED_URL_REFRESH_MARGIN) * SIGNED_URL_REFRESH_MARGIN
+        cached = (_sign(blob_name, permission, datetime.fromtimestamp(expiry, timezone.utc), headers), expiry)
+        with _lock:
+            if len(_cache) >= SIGNED_URL_CACHE_SIZE:
+                _evict(now)
+            _cache[key] = cached
+    return cached[0], datetime.fromtimestamp(cached[1], timezone.utc)
+
+
+def clear_cache():
+    """Forget cached URLs and the delegation key, e.g. after rotating the account key."""
+    global _delegation_key
+    with _lock:
+        _cache.clear()
+        _delegation_key = None
+
+
+def _sign(blob_name, permission, expiry, headers=None):
+    if not AZURE_STORAGE_ACCOUNT_NAME or not (AZURE_STORAGE_ACCOUNT_KEY or AZURE_SAS_USER_DELEGATION):
+        raise ValueError("Azure credentials are not set.")
+
+    credentials = {"user_delegation_key": _user_delegation_key(expiry)} if AZURE_SAS_USER_DELEGATION \
+        else {"account_key": AZURE_STORAGE_ACCOUNT_KEY}
+    sas_token = generate_blob_sas(
+        account_name=AZURE_STORAGE_ACCOUNT_NAME,
+        container_name=AZURE_CONTAINER_NAME,
+        blob_name=blob_name,
+        permission=BlobSasPermissions.from_string(permission),
+        expiry=expiry,
+        **credentials,
+        **(headers or {}),
+    )
+    return f"https://{AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{AZURE_CONTAINER_NAME}/{quote(blob_name)}?{sas_token}"
+
+
+def _user_delegation_key(expiry):
+    """Return a user delegation key valid past `expiry`, fetching a new one only when needed."""
+    global _delegation_key
+    if _delegation_key and _delegation_key[1] >= expiry.timestamp():
+        return _delegation_key[0]
+
+    try:
+        from azure.identity import DefaultAzureCredential
+    except ImportError:
+        raise ValueError("AZURE_SAS_USER_DELEGATION needs the azure-identity package.")
+
+    start = datetime.now(timezone.utc) - timedelta(minutes=5)  # tolerate clock skew
+    key_expiry = max(start + timedelta(hours=USER_DELEGATION_KEY_HOURS), expiry)
+    client = BlobServiceClient(
+        f"https://{AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net", credential=DefaultAzureCredential()
+    )
+    key = client.get_user_delegation_key(start, key_expiry)
+    logger.info(f"Fetched user delegation key valid until {key_expiry.isoformat()}")
+    _delegation_key = (key, key_expiry.timestamp())
+    return key
+
+
+def _evict(now):
+    """Drop URLs that are due for refresh, or the oldest half if all are still fresh."""
+    stale = [key for key, (_, expiry) in _cache.items() if expiry - now <= SIGNED_URL_REFRESH_MARGIN]
+    if not stale:
+        stale = list(_cache)[:len(_cache) // 2 or 1]  # dicts keep insertion order
+    for key in stale:
+        _cache.pop(key, None)
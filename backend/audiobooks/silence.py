@@ -0,0 +1,134 @@
+"""
+CPU-only voice-activity pass that compresses long silences before transcription.
+
+Speech is found from the RMS level of short steps of the decoded PCM stream.
+Long pauses, intros and outros are cut down to a short gap, and an offset map
+is kept so timestamps in the transcript of the trimmed audio can be moved back
+onto the original audio. Levels are measured while streaming, so the audio
+itself is never held in memory.
+"""
+import os
+import math
+import logging
+from array import array
+
+try:
+    import audioop
+except ImportError:
+    import pyaudioop as audioop  # removed from the stdlib in Python 3.13, same fallback as pydub
+
+from .audio_stream import PCM_SAMPLE_WIDTH, pcm_bytes
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIBE_TRIM_SILENCE = os.environ.get("TRANSCRIBE_TRIM_SILENCE", "True").lower() in ("true", "1", "t")
+VAD_MIN_SILENCE_MS = int(os.environ.get("VAD_MIN_SILENCE_MS", 1500))  # only pauses longer than this are compressed
+VAD_SILENCE_THRESH_DB = int(os.environ.get("VAD_SILENCE_THRESH_DB", -20))  # relative to the file's average loudness
+VAD_KEEP_SILENCE_MS = 250  # padding left on each side of speech, so a compressed pause still reads as a pause
+VAD_SEEK_STEP_MS = 20
+
+VAD_STEP_BYTES = pcm_bytes(VAD_SEEK_STEP_MS / 1000)
+
+
+def measure_levels(pcm_chunks):
+    """
+    Consume a PCM stream and return (levels, duration_ms), where `levels` holds the RMS of
+    every VAD_SEEK_STEP_MS step as a compact float array (about 7 MB for ten hours of audio).
+    """
+    levels = array("f")
+    remainder = b""
+    total_bytes = 0
+    for chunk in pcm_chunks:
+        total_bytes += len(chunk)
+        data = remainder + chunk if remainder else chunk
+        whole = len(data) - len(data) % VAD_STEP_BYTES
+        for start in range(0, whole, VAD_STEP_BYTES):
+            levels.append(audioop.rms(data[start:start + VAD_STEP_BYTES], PCM_SAMPLE_WIDTH))
+        remainder = data[whole:]
+    if remainder:
+        levels.append(audioop.rms(remainder, PCM_SAMPLE_WIDTH))
+    return levels, total_bytes * 1000 // pcm_bytes(1)
+
+
+def plan_silence_trim(levels, duration_ms):
+    """
+    Decide which parts of the audio to keep, given its step levels from `measure_levels`.
+    Returns (kept_spans, offset_map, trimmed_percent). `kept_spans` are (start_ms, end_ms)
+    pairs on the original audio; `offset_map` is a list of [trimmed_seconds, original_seconds]
+    pairs marking where each kept span starts.
+    """
+    everything = [(0, duration_ms)], [[0.0, 0.0]], 0.0
+    if not TRANSCRIBE_TRIM_SILENCE or not duration_ms or not levels:
+        return everything
+
+    mean_square = sum(level * level for level in levels) / len(levels)
+    if not mean_square:
+        return everything  # digital silence throughout
+    threshold = math.sqrt(mean_square) * 10 ** (VAD_SILENCE_THRESH_DB / 20)
+    min_silent_steps = math.ceil(VAD_MIN_SILENCE_MS / VAD_SEEK_STEP_MS)
+
+    # Speech spans (in steps) separated by silences of at least VAD_MIN_SILENCE_MS
+    spans = []
+    speech_start = None
+    silent_steps = 0
+    for step, level in enumerate(levels):
+        if level < threshold:
+            silent_steps += 1
+            continue
+        if speech_start is None:
+            speech_start = step if silent_steps >= min_silent_steps else 0
+        elif silent_steps >= min_silent_steps:
+            spans.append((speech_start, step - silent_steps))
+            speech_start = step
+        silent_steps = 0
+    if speech_start is None:
+        return everything
+    spans.append((speech_start, len(levels) - (silent_steps if silent_steps >= min_silent_steps else 0)))
+
+    # Pad each speech span and merge spans whose padding touches
+    padded = []
+    for start, end in spans:
+        start = max(start * VAD_SEEK_STEP_MS - VAD_KEEP_SILENCE_MS, 0)
+        end = min(end * VAD_SEEK_STEP_MS + VAD_KEEP_SILENCE_MS, duration_ms)
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = max(padded[-1][1], end)
+        else:
+            padded.append([start, end])
+
+    kept_spans = [(start, end) for start, end in padded]
+    offset_map = []
+    position_ms = 0
+    for start, end in kept_spans:
+        offset_map.append([position_ms / 1000, start / 1000])
+        position_ms += end - start
+
+    trimmed_percent = round(100 * (1 - position_ms / duration_ms), 2)
+    logger.info(f"Silence trimming removes {trimmed_percent}% of {duration_ms / 1000:.0f}s of audio")
+    return kept_spans, offset_map, trimmed_percent
+
+
+def keep_spans(pcm_chunks, kept_spans):
+    """Yield only the parts of a PCM stream inside `kept_spans` ((start_ms, end_ms) pairs, in order)."""
+    bounds = [(pcm_bytes(start / 1000), pcm_bytes(end / 1000)) for start, end in kept_spans]
+    position = 0
+    index = 0
+    for chunk in pcm_chunks:
+        chunk_end = position + len(chunk)
+        while index < len(bounds) and bounds[index][0] < chunk_end:
+            start, end = bounds[index]
+            if end > position:
+                yield chunk[max(start - position, 0):min(end, chunk_end) - position]
+            if end > chunk_end:
+                break  # span continues in the next chunk
+            index += 1
+        position = chunk_end
+
+
+def to_original_time(seconds, offset_map):
+    """Map a timestamp on the trimmed timeline back onto the original audio."""
+    trimmed_start, original_start = offset_map[0]
+    for entry in offset_map:
+        if entry[0] > seconds:
+            break
+        trimmed_start, original_start = entry
+    return round(original_start + (seconds - trimmed_start), 3)
@@ -1,9 +1,17 @@
 from storages.backends.azure_storage import AzureStorage
 import os
 
+from .signing import signed_url
+
 
 class AzureAudiobookStorage(AzureStorage):
     account_name = os.getenv("AZURE_ACCOUNT_NAME") 
     account_key = os.getenv("AZURE_ACCOUNT_KEY")
     azure_container = os.getenv("AZURE_CONTAINER") # single container for everything in this project
-    expiration_secs = 600  # SAS token expiry in seconds
\ No newline at end of file
+    expiration_secs = 600  # SAS token expiry in seconds
+
+    def url(self, name, expire=None, parameters=None, mode="r"):
+        # Serializers call this for every file on every request; reuse cached SAS URLs instead of re-signing
+        if parameters or expire == 0 or self.custom_domain:
+            return super().url(name, expire=expire, parameters=parameters, mode=mode)
+        return signed_url(self._get_valid_path(name), permission=mode, expires_in=expire or self.expiration_secs)
@@ -0,0 +1,42 @@
+"""
+Token budgeting for the map-reduce summary of an audiobook.
+
+Each part's transcript is split into chunks that fit the prompt budget, the
+chunk summaries are summarized again until one fits, and the part summaries
+are finally reduced into the book description. Token counts are estimated
+from characters, which is close enough to keep prompts under the model limit.
+"""
+import os
+
+from .content_hash import sha256_chunks
+
+SUMMARY_PROMPT_TOKEN_BUDGET = int(os.environ.get("SUMMARY_PROMPT_TOKEN_BUDGET", 8000))  # transcript text per prompt
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", 400))  # completion cap for each partial summary
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count of `text` (about 4 characters per token for English)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_to_token_budget(text, budget=SUMMARY_PROMPT_TOKEN_BUDGET):
+    """Split `text` on whitespace into chunks of at most `budget` estimated tokens."""
+    limit = budget * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    size = 0
+    for word in text.split():
+        if current and size + len(word) + 1 > limit:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(word[:limit])  # a single oversized "word" cannot exceed the budget on its own
+        size += len(current[-1]) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def summary_source_hash(text, model):
+    """Cache key for a part summary: changes when the transcript or the summarizing model changes."""
+    return sha256_chunks([model.encode("utf-8"), b"\n", text.encode("utf-8")])
@@ -0,0 +1,66 @@
+"""
+Normalized audiobook tags.
+
+Tags are rows of Tag, linked to books through `Audiobook.tag_set`. Browsing a
+tag is an index lookup on the join table, not an `icontains` scan of a string.
+Each tag keeps its number of books in `audiobook_count`, so facet lists are
+read straight from the Tag table. `Audiobook.tags` stays as a comma-separated
+display copy of the same tags. Write tags only through `set_tags`, which keeps
+the relation, the display copy and the counts in step.
+"""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+from .models import Audiobook, Tag
+
+TAG_MAX_LENGTH = Tag._meta.get_field("name").max_length
+TAGS_MAX_LENGTH = Audiobook._meta.get_field("tags").max_length  # room for the display copy
+
+
+def tag_slug(name):
+    """The identity of a tag name: "Science  Fiction" and "science-fiction" are one tag."""
+    return slugify(name, allow_unicode=True)
+
+
+def parse_tags(value):
+    """Clean tag names from a comma-separated string or a list, without empties or duplicates."""
+    names = value.split(",") if isinstance(value, str) else list(value or [])
+    tags, seen = [], set()
+    for name in names:
+        name = " ".join(str(name).split())[:TAG_MAX_LENGTH]
+        slug = tag_slug(name)
+        if slug and slug not in seen:
+            seen.add(slug)
+            tags.append(name)
+    return tags
+
+
+def set_tags(audiobook, names):
+    """Replace the tags of `audiobook` and refresh its display copy and the affected facet counts."""
+    tags, display = [], ""
+    for name in parse_tags(names):
+        if len(display) + len(name) + 2 > TAGS_MAX_LENGTH:
+            break
+        tag, _ = Tag.objects.get_or_create(slug=tag_slug(name), defaults={"name": name})
+        tags.append(tag)
+        display = ", ".join(t.name for t in tags)
+
+    with transaction.atomic():
+        previous = set(audiobook.tag_set.values_list("id", flat=True))
+        audiobook.tag_set.set(tags)
+        audiobook.tags = display
+        audiobook.save(update_fields=["tags"])
+        recount_tags(previous | {tag.id for tag in tags})
+    return tags
+
+
+def recount_tags(tag_ids):
+    """Recompute `audiobook_count` of the given tags from the join table."""
+    if not tag_ids:
+        return
+    links = Audiobook.tag_set.through.objects.filter(tag_id=OuterRef("pk")).values("tag_id")
+    Tag.objects.filter(id__in=tag_ids).update(
+        audiobook_count=Coalesce(Subquery(links.annotate(n=Count("audiobook_id")).values("n")), Value(0))
+    )
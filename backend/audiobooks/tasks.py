@@ -1,14 +1,29 @@
-from celery import shared_task, Task
+from celery import shared_task, Task, chord
+from celery.exceptions import Ignore
 from .models import AudiobookFile, Audiobook
 import os
 import tempfile
-import requests
-from pydub import AudioSegment
-from django.core.files.base import ContentFile
+from django.core.files import File
 import json
 import logging
-from django.core.files.base import ContentFile
 from requests.exceptions import RequestException, HTTPError
+from .downloads import download_to_file, discard_partial_download
+from .transcripts import plan_windows, merge_transcripts, restore_original_timestamps
+from .audio_stream import FFmpegError, PCM_SAMPLE_RATE, decode_pcm
+from .metadata import METADATA_FIELDS, probe_metadata
+from .silence import TRANSCRIBE_TRIM_SILENCE, measure_levels, plan_silence_trim, keep_spans
+from .encoding import encode_windows
+from .content_hash import sha256_file
+from .http_client import get_session
+from .rate_limit import transcribe_limiter, summarize_limiter
+from .scheduling import part_priority, file_priority
+from .response_cache import invalidate_audiobook
+from .transcript_index import index_transcript
+from .transcript_store import load_transcript, store_transcript
+from .tags import set_tags
+from .summaries import (
+    SUMMARY_PROMPT_TOKEN_BUDGET, SUMMARY_CHUNK_TOKENS, estimate_tokens, split_to_token_budget, summary_source_hash,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +31,10 @@ AZURE_TRANSCRIBE_ENDPOINT = os.environ.get("AZURE_TRANSCRIBE_ENDPOINT")
 AZURE_TRANSCRIBE_KEY = os.environ.get("AZURE_TRANSCRIBE_KEY")
 AZURE_TRANSCRIBE_MODEL = os.environ.get("AZURE_TRANSCRIBE_MODEL", "gpt-4o-transcribe")
 
+# Audio longer than one window is split into overlapping windows transcribed in parallel (0 disables)
+TRANSCRIBE_SEGMENT_SECONDS = int(os.environ.get("TRANSCRIBE_SEGMENT_SECONDS", 600))
+TRANSCRIBE_SEGMENT_OVERLAP_SECONDS = int(os.environ.get("TRANSCRIBE_SEGMENT_OVERLAP_SECONDS", 5))
+
 AZURE_SUMMARIZE_ENDPOINT = os.environ.get("AZURE_SUMMARIZE_ENDPOINT")
 AZURE_SUMMARIZE_KEY = os.environ.get("AZURE_SUMMARIZE_KEY")
 AZURE_SUMMARIZE_MODEL = os.environ.get("AZURE_SUMMARIZE_MODEL", "gpt-4o-mini")
@@ -29,10 +48,13 @@ class AIServiceError(Exception):
 @shared_task(bind=True,  # Binds the task instance to the function, allowing access to `self`
              autoretry_for=(AIServiceError, RequestException), # Error handling IF openai api fails
              retry_kwargs={'max_retries': 2, 'countdown': 20}) # Max 3 retries
-def transcribe_audio_file(self, audiobook_file_id):
+def transcribe_audio_file(self, audiobook_file_id, force=False):
     """
     Transcribe a single AudiobookFile and store the transcription JSON.
+    This task runs the CPU-bound stage (download, decode, silence trimming, encoding) and then
+    replaces itself with network-bound transcription tasks routed to the `network` queue.
     This task is designed to be resilient to network and AI service failures.
+    Identical audio already transcribed by the same model is reused unless `force` is set.
     """
     logger.info(f"Starting transcription for AudiobookFile ID {audiobook_file_id}")
     file_obj = AudiobookFile.objects.get(id=audiobook_file_id)
@@ -40,99 +62,252 @@ def transcribe_audio_file(self, audiobook_file_id):
     file_obj.save()
 
     audio_file_path = None
-    audio_wav_path = None
+    retries_left = False
 
     try:
-        # 1. Download file locally from Azure Blob Storage
+        # 0. Reuse the transcription of identical audio when the content hash is already known
+        if not force and reuse_cached_transcription(file_obj):
+            return {"audiobook_file_id": audiobook_file_id, "status": "cached"}
+
+        # 1. Stream file to local disk from Azure Blob Storage (resumes across retries)
         audio_url = file_obj.file.url
         logger.info(f"Downloading audio from {audio_url}")
-        audio_file_path = tempfile.mktemp(suffix=".mp3")
+        audio_file_path = os.path.join(tempfile.gettempdir(), f"audiocity_{audiobook_file_id}.mp3")
         try:
-            r = requests.get(audio_url)
-            r.raise_for_status() # Raise an exception for bad status codes
-            with open(audio_file_path, "wb") as f:
-                f.write(r.content)
-        except RequestException as e:
+            download_to_file(audio_url, audio_file_path)
+        except (RequestException, OSError) as e:
             logger.error(f"Download failed for file {audiobook_file_id}: {e}")
             raise AIServiceError(f"Download error: {e}")
 
-        # 2. Convert to WAV format using pydub
-        audio_wav_path = audio_file_path.replace(".mp3", ".wav")
+        if not file_obj.content_hash:
+            file_obj.content_hash = sha256_file(audio_file_path)
+            file_obj.save(update_fields=["content_hash"])
+            if not force and reuse_cached_transcription(file_obj):
+                return {"audiobook_file_id": audiobook_file_id, "status": "cached"}
+
+        # 2. Measure loudness in one streaming decode pass and plan which silences to compress
+        if file_obj.duration_seconds is None:
+            # Parts uploaded before metadata was probed at upload time
+            for field, value in probe_metadata(audio_file_path).items():
+                setattr(file_obj, field, value)
+            file_obj.save(update_fields=METADATA_FIELDS)
+
         try:
-            AudioSegment.from_file(audio_file_path).export(audio_wav_path, format="wav")
+            if TRANSCRIBE_TRIM_SILENCE or not file_obj.duration_seconds:
+                levels, duration_ms = measure_levels(decode_pcm(audio_file_path))
+            else:
+                levels, duration_ms = None, int(file_obj.duration_seconds * 1000)
+            kept_spans, offset_map, file_obj.silence_trimmed_percent = plan_silence_trim(levels, duration_ms)
         except Exception as e:
             logger.error(f"File conversion failed for {audiobook_file_id}: {e}")
             # Raise a custom exception to signal a need for Celery retry
             raise AIServiceError(f"Audio conversion error: {e}")
 
-        # 3. Call Azure GPT-4o Transcribe API
-        headers = {"api-key": AZURE_TRANSCRIBE_KEY}
-        with open(audio_wav_path, "rb") as f:
-            files = {"file": (os.path.basename(audio_wav_path), f, "audio/wav")}
-            data = {"model": AZURE_TRANSCRIBE_MODEL}
-            try:
-                response = requests.post(
-                    AZURE_TRANSCRIBE_ENDPOINT,
-                    headers=headers,
-                    files=files,
-                    data=data,
-                )
-                response.raise_for_status() # Raise for bad status codes (4xx or 5xx)
-            except HTTPError as e:
-                logger.error(f"AI transcription API returned an error for {audiobook_file_id}: {e}")
-                # Raise a custom exception to signal a need for Celery retry
-                raise AIServiceError(f"AI API error: {e}")
-            except RequestException as e:
-                logger.error(f"AI transcription API request failed for {audiobook_file_id}: {e}")
-                raise AIServiceError(f"AI API request error: {e}")
-
-        transcript = response.json()
-        # logger.info(f"Transcription result for {audiobook_file_id}: {transcript}")
-
-        # 4. Save individual transcript to the AudiobookFile model
-        file_obj.transcription_file.save(
-            f"{file_obj.id}_transcription.json",
-            ContentFile(json.dumps(transcript, ensure_ascii=False).encode("utf-8")),
-            save=True,
-        )
+        # 3. Encode compact 16 kHz mono windows (one for short audio) in a second pass and stage them in blob storage
+        trimmed_seconds = sum(end - start for start, end in kept_spans) / 1000
+        windows = plan_windows(trimmed_seconds, TRANSCRIBE_SEGMENT_SECONDS, TRANSCRIBE_SEGMENT_OVERLAP_SECONDS)
+        transcription = build_transcription_chord(file_obj, audio_file_path, kept_spans, windows, offset_map)
 
-        file_obj.status = 'SUCCESS'
-        file_obj.save()
-        logger.info(f"Successfully processed AudiobookFile {audiobook_file_id}")
-
-        logger.info("FILE OBJ ORDER:")
-        logger.info(file_obj.order)
-        logger.info(file_obj.order)
-        logger.info(file_obj.order)
-        logger.info(file_obj.order)
-        logger.info(file_obj.order)
-
-        # Trigger next task - summary generation for the audiobook using first transcript ONLY
-        if file_obj.order == 1: # ONLY if file_obj is 1, rest will be ignored
-            generate_summary_and_tags.delay(str(file_obj.audiobook.id))  
-
-        return {"audiobook_file_id": audiobook_file_id, "status": "success"}
+        # 4. Hand the Azure transcribe calls over to the network queue. Replacing (rather than just
+        #    launching) keeps an enclosing audiobook pipeline waiting until the transcript is saved
+        return self.replace(transcription)
 
     except (AudiobookFile.DoesNotExist, Audiobook.DoesNotExist) as e:
         logger.error(f"Audiobook file or audiobook not found: {e}")
         # Do not retry, as this is a permanent error.
         raise e
 
+    except Ignore:
+        # Task was replaced by the transcription chord, not a failure
+        raise
+
     except Exception as e:
         # Catch any unexpected errors that were not handled above.
         logger.error(f"An unexpected error occurred for {audiobook_file_id}: {e}")
         file_obj.status = 'FAILED'
         file_obj.save()
+        retries_left = self.request.retries < self.max_retries and not self.request.called_directly
+        if audio_file_path and not retries_left:
+            discard_partial_download(audio_file_path)  # no retry left to resume from it
         # Raise an exception to tell Celery to retry
         # The 'autoretry_for' decorator will handle the retry logic.
         raise self.retry(exc=e)
 
     finally:
-        # Clean up temporary files
-        if audio_file_path and os.path.exists(audio_file_path):
+        # Clean up temporary files (the downloaded audio is kept while a retry can still reuse it)
+        if audio_file_path and os.path.exists(audio_file_path) and not retries_left:
             os.remove(audio_file_path)
-        if audio_wav_path and os.path.exists(audio_wav_path):
-            os.remove(audio_wav_path)
+
+
+def request_transcription(audio_path, mime_type, audio_seconds, label):
+    """
+    Send one audio file to the Azure transcribe endpoint and return the transcript JSON.
+    Waits for cluster-wide quota first; `audio_seconds` is what the call costs against it.
+    `label` identifies the file (or segment) in logs.
+    """
+    transcribe_limiter.acquire(units=audio_seconds)
+
+    headers = {"api-key": AZURE_TRANSCRIBE_KEY}
+    with open(audio_path, "rb") as f:
+        files = {"file": (os.path.basename(audio_path), f, mime_type)}
+        data = {"model": AZURE_TRANSCRIBE_MODEL}
+        try:
+            response = get_session().post(
+                AZURE_TRANSCRIBE_ENDPOINT,
+                headers=headers,
+                files=files,
+                data=data,
+            )
+            response.raise_for_status() # Raise for bad status codes (4xx or 5xx)
+        except HTTPError as e:
+            logger.error(f"AI transcription API returned an error for {label}: {e}")
+            # Raise a custom exception to signal a need for Celery retry
+            raise AIServiceError(f"AI API error: {e}")
+        except RequestException as e:
+            logger.error(f"AI transcription API request failed for {label}: {e}")
+            raise AIServiceError(f"AI API request error: {e}")
+
+    return response.json()
+
+
+def save_transcription(file_obj, transcript):
+    """Store the transcript JSON (compressed) on the AudiobookFile, index its passages for search, and mark it done."""
+    store_transcript(file_obj, transcript)
+    file_obj.save()
+    index_transcript(file_obj, transcript)
+    complete_transcription(file_obj)
+
+
+def complete_transcription(file_obj):
+    """Mark a transcribed AudiobookFile as done. Summarization runs once the whole audiobook pipeline has finished."""
+    file_obj.status = 'SUCCESS'
+    file_obj.transcription_model = AZURE_TRANSCRIBE_MODEL
+    file_obj.save()
+    logger.info(f"Successfully processed AudiobookFile {file_obj.id}")
+
+
+def reuse_cached_transcription(file_obj):
+    """
+    Reuse `file_obj`'s own transcript when the same model made it, else look up a finished
+    transcription of the same audio (content hash) by the same model. Returns True on a cache hit.
+    """
+    # Checked on the row itself: the task has already moved it to PROCESSING
+    if file_obj.transcription_file and file_obj.transcription_model == AZURE_TRANSCRIBE_MODEL:
+        logger.info(f"Reusing the existing transcription of AudiobookFile {file_obj.id}")
+        complete_transcription(file_obj)
+        return True
+    if not file_obj.content_hash:
+        return False
+
+    cached = AudiobookFile.objects.filter(
+        content_hash=file_obj.content_hash,
+        transcription_model=AZURE_TRANSCRIBE_MODEL,
+        status='SUCCESS',
+    ).exclude(id=file_obj.id).exclude(transcription_file="").exclude(transcription_file__isnull=True).first()
+    if not cached:
+        return False
+
+    logger.info(f"Reusing transcription of AudiobookFile {cached.id} for {file_obj.id} (sha256 {file_obj.content_hash})")
+    # Copy rather than share the blob, so deleting one audiobook never breaks another
+    save_transcription(file_obj, load_transcript(cached))
+    return True
+
+
+def build_transcription_chord(file_obj, audio_path, kept_spans, windows, offset_map):
+    """
+    Stream the audio at `audio_path` through ffmpeg, drop everything outside `kept_spans`,
+    encode each window, upload it as its own blob and return a chord that transcribes the
+    windows in parallel. The chord callback stitches the results once every window has
+    succeeded, and uses `offset_map` to move timestamps from the silence-trimmed audio back
+    onto the original.
+    """
+    storage = file_obj.file.storage
+    priority = file_priority(file_obj)  # windows keep their part's fair-share slot
+    header = []
+    bytes_saved = 0
+    segment_base = os.path.join(tempfile.gettempdir(), f"audiocity_{file_obj.id}_upload")
+    pcm = keep_spans(decode_pcm(audio_path), kept_spans)
+    # The upload saving is measured against a WAV in the part's own format (from its header metadata)
+    source_bytes_per_second = (file_obj.sample_rate or PCM_SAMPLE_RATE) * (file_obj.channels or 1) * 2
+    try:
+        encoded = encode_windows(pcm, windows, segment_base, AZURE_TRANSCRIBE_MODEL, source_bytes_per_second)
+        for index, segment_path, mime_type, saved in encoded:
+            try:
+                with open(segment_path, "rb") as f:
+                    suffix = os.path.splitext(segment_path)[1]
+                    blob_name = storage.save(f"{file_obj.audiobook_id}/segments/{file_obj.id}/{index:04d}{suffix}", File(f))
+            finally:
+                if os.path.exists(segment_path):
+                    os.remove(segment_path)
+            bytes_saved += saved
+            start, end = windows[index]
+            overlap = TRANSCRIBE_SEGMENT_OVERLAP_SECONDS if index else 0
+            header.append(
+                transcribe_segment.s(str(file_obj.id), index, blob_name, mime_type, start, end - start, overlap)
+                .set(priority=priority)
+            )
+    except FFmpegError as e:
+        raise AIServiceError(f"Audio conversion error: {e}")
+
+    file_obj.upload_bytes_saved = max(bytes_saved, 0)  # a window can cost more than its share of WAV
+    file_obj.save(update_fields=["upload_bytes_saved", "silence_trimmed_percent"])
+
+    logger.info(f"Transcribing AudiobookFile {file_obj.id} as {len(header)} segment(s)")
+    return chord(header, merge_segment_transcriptions.s(str(file_obj.id), offset_map))
+
+
+@shared_task(bind=True,
+             autoretry_for=(AIServiceError, RequestException),
+             retry_kwargs={'max_retries': 2, 'countdown': 20})
+def transcribe_segment(self, audiobook_file_id, index, blob_name, mime_type, offset, duration, overlap):
+    """
+    Transcribe one encoded window of an AudiobookFile (network-bound stage).
+    A failing window is retried on its own without redoing the others.
+    """
+    label = f"{audiobook_file_id} segment {index}"
+    suffix = os.path.splitext(blob_name)[1]
+    segment_path = os.path.join(tempfile.gettempdir(), f"audiocity_{audiobook_file_id}_{index:04d}{suffix}")
+    try:
+        storage = AudiobookFile._meta.get_field("file").storage
+        download_to_file(storage.url(blob_name), segment_path)
+        transcript = request_transcription(segment_path, mime_type, duration, label)
+        return {"index": index, "offset": offset, "overlap": overlap, "blob_name": blob_name, "transcript": transcript}
+
+    except Exception as e:
+        logger.error(f"Transcription failed for {label}: {e}")
+        # A direct call is never retried; otherwise the part only fails once its last retry has
+        retries_left = self.request.retries < self.max_retries and not self.request.called_directly
+        if not retries_left:
+            failed = AudiobookFile.objects.filter(id=audiobook_file_id)
+            failed.update(status='FAILED')
+            for audiobook_id in failed.values_list("audiobook_id", flat=True):
+                invalidate_audiobook(audiobook_id, catalogue=False)  # update() sends no save signal
+            discard_partial_download(segment_path)  # no retry left to resume from it
+        raise self.retry(exc=e)
+
+    finally:
+        if os.path.exists(segment_path):
+            os.remove(segment_path)
+
+
+@shared_task
+def merge_segment_transcriptions(results, audiobook_file_id, offset_map):
+    """
+    Chord callback: stitch the window transcripts into the AudiobookFile transcription
+    and remove the temporary segment blobs.
+    """
+    file_obj = AudiobookFile.objects.get(id=audiobook_file_id)
+    transcript = restore_original_timestamps(merge_transcripts(results), offset_map)
+    save_transcription(file_obj, transcript)
+
+    storage = file_obj.file.storage
+    for result in results:
+        try:
+            storage.delete(result["blob_name"])
+        except Exception as e:
+            logger.warning(f"Could not delete segment blob {result['blob_name']}: {e}")
+
+    return {"audiobook_file_id": audiobook_file_id, "status": "success", "segments": len(results)}
 
 
 
@@ -142,38 +317,37 @@ def transcribe_audio_file(self, audiobook_file_id):
              retry_kwargs={'max_retries': 0, 'countdown': 20})
 def generate_summary_and_tags(self, audiobook_id):
     """
-    Generate a 1-paragraph summary and up to 3 tags from the first transcription
-    of the given Audiobook, and store them in description and tags fields.
+    Generate a 1-paragraph summary and up to 3 tags from all transcriptions of the
+    given Audiobook, and store them in description and tags fields.
+    Each part is summarized on its own (map) and cached on the AudiobookFile, then
+    the part summaries are combined into the book description (reduce).
     """
     logger.info(f"Starting summary/tag generation for Audiobook ID {audiobook_id}")
     try:
-        # 1. Get the audiobook and its first transcription file - no need to use the entire transcript
+        # 1. Get the audiobook and its transcribed parts, in reading order
         audiobook = Audiobook.objects.get(id=audiobook_id)
-        first_file = AudiobookFile.objects.filter(
-            audiobook=audiobook,
-            transcription_file__isnull=False
-        ).order_by("created_at").first()
+        files = [
+            f for f in AudiobookFile.objects.filter(audiobook=audiobook).order_by("order", "created_at")
+            if f.transcription_file
+        ]
 
-        if not first_file:
+        if not files:
             logger.warning(f"No transcription available for audiobook {audiobook_id}")
             return {"audiobook_id": audiobook_id, "status": "no_transcription"}
 
-        # Load the transcription JSON
-        transcript_content = first_file.transcription_file.read().decode("utf-8")
-        transcript_data = json.loads(transcript_content)
-
-        # Extract text depending on transcript format
-        transcript_text = transcript_data.get("text") or transcript_content
-        logger.debug(f"Transcript snippet for {audiobook_id}: {transcript_text[:200]}...")
-
-        # 2. Call Azure LLM for summary + tags (PROMPT)
-        headers = {
-            "api-key": AZURE_SUMMARIZE_KEY,
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": AZURE_SUMMARIZE_MODEL,
-            "messages": [
+        # 2. Map: summarize each part, reusing cached summaries of unchanged transcripts
+        part_summaries = [summarize_part(file_obj) for file_obj in files]
+
+        # 3. Reduce: combine the part summaries (condensed further if they exceed the prompt budget)
+        combined = "\n\n".join(
+            f"Part {i}: {summary}" for i, summary in enumerate(part_summaries, start=1) if summary
+        )
+        if estimate_tokens(combined) > SUMMARY_PROMPT_TOKEN_BUDGET:
+            combined = condense_text(combined, f"audiobook {audiobook_id}")
+        logger.debug(f"Part summaries for {audiobook_id}: {combined[:200]}...")
+
+        ai_output = request_summary(
+            [
                 {
                     "role": "system",
                     "content": (
@@ -184,31 +358,12 @@ def generate_summary_and_tags(self, audiobook_id):
                 },
                 {
                     "role": "user",
-                    "content": f"Here is a transcript:\n\n{transcript_text}\n\nWrite an introductory description of the entire book."
+                    "content": f"Here are summaries of the parts of an audiobook, in order:\n\n{combined}\n\nWrite an introductory description of the entire book."
                 }
             ],
-            "max_tokens": 300,
-        }
-
-        try:
-            response = requests.post(
-                AZURE_SUMMARIZE_ENDPOINT,
-                headers=headers,
-                json=payload,
-            )
-            response.raise_for_status()
-        except HTTPError as e:
-            logger.error(f"AI summary API returned an error for audiobook {audiobook_id}: {e}")
-            raise AIServiceError(f"AI API error: {e}")
-        except RequestException as e:
-            logger.error(f"AI summary API request failed for audiobook {audiobook_id}: {e}")
-            raise AIServiceError(f"AI API request error: {e}")
-
-        result = response.json()
-        logger.debug(f"Raw AI response: {result}")
-
-        # Extract AI output (strict structured JSON string)
-        ai_output = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+            max_tokens=300,
+            label=f"audiobook {audiobook_id}",
+        )
 
         try:
             parsed = json.loads(ai_output)
@@ -219,10 +374,13 @@ def generate_summary_and_tags(self, audiobook_id):
         summary = parsed.get("summary", "").strip()
         tags = parsed.get("tags", [])
 
-        # 3. Save into Audiobook model (description + comma-separated tags)
+        # 4. Save into Audiobook model (description + normalized tags)
         audiobook.description = summary
-        audiobook.tags = ", ".join(tags)
-        audiobook.save()
+        audiobook.save(update_fields=["description"])
+        set_tags(audiobook, tags)
+
+        Audiobook.objects.filter(id=audiobook_id, pipeline_status='SUMMARIZING').update(pipeline_status='READY')
+        invalidate_audiobook(audiobook_id)
 
         logger.info(f"Successfully generated summary/tags for Audiobook {audiobook_id}")
         return {"audiobook_id": audiobook_id, "status": "success", "description": summary, "tags": tags}
@@ -233,3 +391,145 @@ def generate_summary_and_tags(self, audiobook_id):
     except Exception as e:
         logger.error(f"Unexpected error while generating summary/tags for audiobook {audiobook_id}: {e}")
         raise self.retry(exc=e)
+
+
+def summarize_part(file_obj):
+    """
+    Return the summary of one AudiobookFile's transcript, computing it only when the
+    transcript (or summarizing model) changed since the cached summary was made.
+    """
+    transcript_text = load_transcript(file_obj).get("text") or ""
+
+    source_hash = summary_source_hash(transcript_text, AZURE_SUMMARIZE_MODEL)
+    if file_obj.summary_source_hash == source_hash:
+        logger.info(f"Reusing cached summary for file {file_obj.id}")
+        return file_obj.summary
+
+    file_obj.summary = condense_text(transcript_text, f"file {file_obj.id}") if transcript_text.strip() else ""
+    file_obj.summary_source_hash = source_hash
+    file_obj.save(update_fields=["summary", "summary_source_hash"])
+    return file_obj.summary
+
+
+def condense_text(text, label):
+    """
+    Summarize `text` into at most SUMMARY_CHUNK_TOKENS. Text over the prompt budget is
+    summarized chunk by chunk, and the chunk summaries are condensed again until one remains.
+    """
+    chunks = split_to_token_budget(text, SUMMARY_PROMPT_TOKEN_BUDGET)
+    summaries = [
+        request_summary(
+            [
+                {
+                    "role": "system",
+                    "content": (
+                        "You summarize sections of audiobook transcripts. Reply with a plain-text summary "
+                        "covering the main events, characters, topics and tone of the section."
+                    )
+                },
+                {"role": "user", "content": chunk},
+            ],
+            max_tokens=SUMMARY_CHUNK_TOKENS,
+            label=f"{label} chunk {i}",
+        )
+        for i, chunk in enumerate(chunks)
+    ]
+    if len(summaries) == 1:
+        return summaries[0]
+    return condense_text("\n\n".join(summaries), label)
+
+
+def request_summary(messages, max_tokens, label):
+    """
+    Send one chat completion to the Azure summarize endpoint and return the reply text.
+    Waits for cluster-wide quota first; the estimated prompt tokens plus `max_tokens` is the cost.
+    """
+    summarize_limiter.acquire(units=sum(estimate_tokens(m["content"]) for m in messages) + max_tokens)
+
+    headers = {
+        "api-key": AZURE_SUMMARIZE_KEY,
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": AZURE_SUMMARIZE_MODEL,
+        "messages": messages,
+        "max_tokens": max_tokens,
+    }
+    try:
+        response = get_session().post(
+            AZURE_SUMMARIZE_ENDPOINT,
+            headers=headers,
+            json=payload,
+        )
+        response.raise_for_status()
+    except HTTPError as e:
+        logger.error(f"AI summary API returned an error for {label}: {e}")
+        raise AIServiceError(f"AI API error: {e}")
+    except RequestException as e:
+        logger.error(f"AI summary API request failed for {label}: {e}")
+        raise AIServiceError(f"AI API request error: {e}")
+
+    result = response.json()
+    logger.debug(f"Raw AI response: {result}")
+    return result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+
+
+def start_audiobook_pipeline(audiobook, force=False):
+    """
+    Process a whole audiobook as one Celery canvas:
+    transcribe every AudiobookFile in parallel (fan-out), then once all have finished
+    aggregate the transcripts and summarize the book (fan-in).
+    Parts are queued with fair-share priorities so large books interleave with others.
+    Progress is tracked on `Audiobook.pipeline_status`.
+    """
+    workflow = build_audiobook_pipeline(audiobook, force=force)
+
+    audiobook.pipeline_status = 'TRANSCRIBING'
+    audiobook.save(update_fields=["pipeline_status"])
+
+    return workflow.apply_async()
+
+
+def build_audiobook_pipeline(audiobook, force=False):
+    """
+    Return the canvas of `start_audiobook_pipeline` without sending it, so callers can
+    enqueue many books together. The caller is responsible for setting `pipeline_status`.
+    """
+    audiobook_id = str(audiobook.id)
+    header = [
+        transcribe_audio_file.si(str(file_id), force=force).set(priority=part_priority(rank, audiobook.high_priority))
+        for rank, file_id in enumerate(audiobook.audio_files.values_list("id", flat=True))
+    ]
+    body = aggregate_audiobook_transcription.si(audiobook_id) | generate_summary_and_tags.si(audiobook_id)
+
+    workflow = chord(header, body) if header else body
+    workflow.on_error(audiobook_pipeline_failed.s(audiobook_id))
+    logger.info(f"Built pipeline for Audiobook {audiobook_id} with {len(header)} files")
+    return workflow
+
+
+@shared_task
+def aggregate_audiobook_transcription(audiobook_id):
+    """
+    Pipeline fan-in: combine the per-file transcripts, in order, into the book-level
+    transcription file and move the audiobook on to summarization.
+    """
+    audiobook = Audiobook.objects.get(id=audiobook_id)
+    parts = []
+    for file_obj in audiobook.audio_files.exclude(transcription_file="").exclude(transcription_file__isnull=True):
+        text = load_transcript(file_obj).get("text", "")
+        parts.append({"file_id": str(file_obj.id), "order": file_obj.order, "text": text})
+
+    transcript = {"text": "\n\n".join(p["text"] for p in parts), "parts": parts}
+    store_transcript(audiobook, transcript)
+    audiobook.pipeline_status = 'SUMMARIZING'
+    audiobook.save(update_fields=["transcription_file", "transcription_index", "pipeline_status"])
+    return {"audiobook_id": audiobook_id, "status": "aggregated", "files": len(parts)}
+
+
+@shared_task
+def audiobook_pipeline_failed(request, exc, traceback, audiobook_id):
+    """Pipeline errback: a file or the summary failed for good."""
+    logger.error(f"Pipeline failed for Audiobook {audiobook_id} in task {request.id}: {exc}")
+    Audiobook.objects.filter(id=audiobook_id).update(pipeline_status='FAILED')
+    invalidate_audiobook(audiobook_id)
@@ -0,0 +1,104 @@
+"""
+Search and reading inside books.
+
+When a part's transcript is saved, its timestamped passages are also written
+to TranscriptSegment rows. A trigger fills their search vectors and a GIN index
+serves the match (migration 0019), so finding a passage, and the second it
+starts at, never reads a transcript blob. Readers fetch passages from the same
+rows, one page or one time range at a time, instead of the whole transcript
+JSON.
+"""
+import os
+import logging
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import TranscriptSegment
+from .search import SEARCH_CONFIG, SEARCH_MAX_QUERY_LENGTH
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_PASSAGE_WORDS = int(os.environ.get("TRANSCRIPT_PASSAGE_WORDS", 60))  # passage length when the transcript has no segments
+TRANSCRIPT_PAGE_SIZE = int(os.environ.get("TRANSCRIPT_PAGE_SIZE", 100))
+TRANSCRIPT_MAX_PAGE_SIZE = 500
+
+
+def transcript_passages(transcript):
+    """
+    Return (start, end, text) passages of a transcript JSON: its segments, else its timed
+    words grouped into passages, else its text in passages without timestamps.
+    """
+    segments = [s for s in transcript.get("segments") or [] if (s.get("text") or "").strip()]
+    if segments:
+        return [(s.get("start"), s.get("end"), s["text"].strip()) for s in segments]
+
+    words = [w for w in transcript.get("words") or [] if (w.get("word") or "").strip()]
+    if words:
+        return [
+            (group[0].get("start"), group[-1].get("end"), " ".join(w["word"].strip() for w in group))
+            for group in _groups(words, TRANSCRIPT_PASSAGE_WORDS)
+        ]
+
+    return [(None, None, " ".join(group)) for group in _groups((transcript.get("text") or "").split(), TRANSCRIPT_PASSAGE_WORDS)]
+
+
+def index_transcript(file_obj, transcript):
+    """Replace the indexed passages of `file_obj` with those of `transcript`."""
+    rows = [
+        TranscriptSegment(
+            audiobook_id=file_obj.audiobook_id, audiobook_file=file_obj,
+            position=position, start=start, end=end, text=text,
+        )
+        for position, (start, end, text) in enumerate(transcript_passages(transcript))
+    ]
+    with transaction.atomic():
+        TranscriptSegment.objects.filter(audiobook_file=file_obj).delete()
+        TranscriptSegment.objects.bulk_create(rows, batch_size=1000)
+        file_obj.transcript_segment_count = len(rows)
+        file_obj.save(update_fields=["transcript_segment_count"])
+    logger.info(f"Indexed {len(rows)} transcript passage(s) of AudiobookFile {file_obj.id}")
+    return len(rows)
+
+
+def search_transcript(audiobook_id, text):
+    """
+    Passages of an audiobook matching `text` (web-search syntax), in reading order,
+    each with its part `order` and search `rank`.
+    """
+    query = SearchQuery(text[:SEARCH_MAX_QUERY_LENGTH], search_type="websearch", config=SEARCH_CONFIG)
+    return (
+        TranscriptSegment.objects.filter(audiobook_id=audiobook_id, search_vector=query)
+        .annotate(order=F("audiobook_file__order"), rank=SearchRank(F("search_vector"), query))
+        .defer("search_vector")
+        .order_by("order", "audiobook_file_id", "position")
+    )
+
+
+def transcript_page(file_obj, first, count):
+    """Passages `first`..`first + count - 1` of a part; positions are dense, so this is an index range."""
+    return (
+        TranscriptSegment.objects.filter(audiobook_file=file_obj, position__gte=first, position__lt=first + count)
+        .defer("search_vector")
+        .order_by("position")
+    )
+
+
+def transcript_range(file_obj, start, end):
+    """
+    Passages of a part heard between `start` and `end` seconds, in order: the one playing
+    at `start` and every one beginning before `end`. Untimed passages never match.
+    """
+    passages = TranscriptSegment.objects.filter(audiobook_file=file_obj)
+    playing = passages.filter(start__lte=start).order_by("-start").values("start")[:1]
+    return (
+        passages.filter(start__gte=Coalesce(Subquery(playing), Value(float(start))), start__lt=end, end__gt=start)
+        .defer("search_vector")
+        .order_by("start", "position")
+    )
+
+
+def _groups(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
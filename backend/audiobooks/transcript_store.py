@@ -0,0 +1,117 @@
+"""
+Compressed, seekable transcript blobs.
+
+A transcript's JSON is gzipped as one stream that is fully flushed every
+TRANSCRIPT_FRAME_SIZE bytes of JSON. A full flush byte-aligns the output and
+resets the compression history, so inflating can start at any frame boundary
+without the data before it. The blob is a single gzip member, so any gzip
+reader returns the original JSON, and browsers decode it when it is served with
+`Content-Encoding: gzip`. Next to the blob, the row keeps a small offset index
+(`transcription_index`):
+
+    {"size": <JSON bytes>, "frames": [[<JSON offset>, <blob offset>], ...]}
+
+A reader that only needs some of the JSON, such as a resumed download, fetches
+the blob from the frame holding its first byte and decompresses only from
+there. Rows without an index hold plain JSON blobs written before this format
+existed (migration 0023 converts them).
+"""
+import os
+import gzip
+import json
+import zlib
+import bisect
+import struct
+import logging
+
+from django.core.files.base import ContentFile
+
+from .downloads import iter_blob
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_FRAME_SIZE = int(os.environ.get("TRANSCRIPT_FRAME_SIZE", 64 * 1024))  # JSON bytes per independently compressed frame
+TRANSCRIPT_COMPRESS_LEVEL = 6
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"  # deflate, no name, mtime 0, unknown OS
+
+
+def pack_transcript(transcript):
+    """Return (blob bytes, offset index) of a transcript JSON object."""
+    raw = json.dumps(transcript, ensure_ascii=False).encode("utf-8")
+    compressor = zlib.compressobj(TRANSCRIPT_COMPRESS_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    frames, blob = [], bytearray(GZIP_HEADER)
+    for offset in range(0, len(raw), TRANSCRIPT_FRAME_SIZE):
+        frames.append([offset, len(blob)])
+        blob += compressor.compress(raw[offset:offset + TRANSCRIPT_FRAME_SIZE])
+        blob += compressor.flush(zlib.Z_FULL_FLUSH)
+    blob += compressor.flush()
+    blob += struct.pack("<II", zlib.crc32(raw), len(raw) & 0xFFFFFFFF)
+    return bytes(blob), {"size": len(raw), "frames": frames}
+
+
+def store_transcript(obj, transcript):
+    """
+    Write `transcript` to `obj.transcription_file` (an Audiobook or AudiobookFile) in the
+    compressed format and set its index. The caller saves `obj`.
+    """
+    blob, index = pack_transcript(transcript)
+    obj.transcription_index = index
+    obj.transcription_file.save(f"{obj.id}_transcription.json.gz", ContentFile(blob), save=False)
+    logger.info(f"Stored transcript of {obj.id}: {index['size']} bytes as {len(blob)} in {len(index['frames'])} frame(s)")
+
+
+def load_transcript(obj):
+    """The transcript JSON object of `obj`, in either storage format."""
+    with obj.transcription_file.open("rb") as f:
+        data = f.read()
+    return json.loads(gzip.decompress(data) if obj.transcription_index else data)
+
+
+def transcript_size(obj):
+    """Size of `obj`'s transcript as JSON, or None for a plain blob (its blob size)."""
+    return obj.transcription_index["size"] if obj.transcription_index else None
+
+
+def iter_transcript(obj, start=0, end=None):
+    """
+    Yield bytes `start`..`end` (exclusive, to the end if None) of `obj`'s transcript as JSON,
+    decompressing only the frames from the one holding `start` onwards.
+    """
+    index = obj.transcription_index
+    if index:
+        frame = max(bisect.bisect_right([raw for raw, _ in index["frames"]], start) - 1, 0)
+        position, blob_offset = index["frames"][frame] if index["frames"] else (0, 0)
+        chunks = _inflate(iter_blob(obj.transcription_file.url, blob_offset))
+    else:
+        position, chunks = start, iter_blob(obj.transcription_file.url, start)
+
+    skip = start - position
+    remaining = None if end is None else end - start
+    try:
+        for chunk in chunks:
+            if skip:
+                dropped = min(skip, len(chunk))
+                chunk, skip = chunk[dropped:], skip - dropped
+            if remaining is not None:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+            if chunk:
+                yield chunk
+            if remaining == 0:
+                return
+    finally:
+        chunks.close()  # stop the blob download as soon as the range is sent
+
+
+def _inflate(chunks):
+    # Frames start on full-flush boundaries, so raw deflate picks up there; the gzip trailer after the end is skipped
+    inflater = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = inflater.decompress(chunk)
+            if data:
+                yield data
+            if inflater.eof:
+                return
+    finally:
+        chunks.close()
@@ -0,0 +1,135 @@
+"""
+Helpers for splitting long audio into overlapping transcription windows and
+stitching the per-window transcripts back into a single transcription JSON.
+"""
+import re
+from difflib import SequenceMatcher
+
+from .silence import to_original_time
+
+TIMED_KEYS = ("segments", "words")  # verbose transcript lists carrying start/end timestamps
+OVERLAP_SEARCH_WORDS = 64  # how far into each side of a seam to look for the repeated words
+MIN_OVERLAP_WORDS = 3  # shorter matches are treated as coincidence, not overlap
+
+
+def plan_windows(duration, window, overlap):
+    """
+    Return the (start, end) offsets in seconds of overlapping windows covering `duration`.
+    A non-positive `window` or audio shorter than one window yields a single window.
+    """
+    if window <= 0 or duration <= window:
+        return [(0.0, duration)]
+    if overlap >= window:
+        raise ValueError("Segment overlap must be shorter than the segment window.")
+
+    windows = []
+    start = 0.0
+    while True:
+        end = min(start + window, duration)
+        windows.append((start, end))
+        if end >= duration:
+            return windows
+        start += window - overlap
+
+
+def merge_transcripts(parts):
+    """
+    Stitch window transcripts into one transcript.
+    `parts` is a list of {"offset", "overlap", "transcript"} dicts, where `offset` is the
+    window start in the transcribed audio and `overlap` the seconds shared with the previous window.
+    """
+    if len(parts) == 1 and not parts[0]["offset"]:
+        return parts[0]["transcript"]  # unsegmented audio, nothing to stitch
+
+    parts = sorted(parts, key=lambda p: p["offset"])
+    merged = {}
+    words = []
+
+    for i, part in enumerate(parts):
+        transcript = part["transcript"]
+
+        # Timestamped items are split at the middle of each overlap, so every moment
+        # of the original audio is owned by exactly one window.
+        lower = part["offset"] + part["overlap"] / 2 if i > 0 else float("-inf")
+        upper = float("inf")
+        if i + 1 < len(parts):
+            upper = parts[i + 1]["offset"] + parts[i + 1]["overlap"] / 2
+
+        for key in TIMED_KEYS:
+            if key in transcript:
+                merged.setdefault(key, []).extend(
+                    _shift_items(transcript[key], part["offset"], lower, upper)
+                )
+
+        words = _append_words(words, (transcript.get("text") or "").split())
+
+    if "segments" in merged:
+        for i, segment in enumerate(merged["segments"]):
+            segment["id"] = i
+        merged["text"] = " ".join(s.get("text", "").strip() for s in merged["segments"]).strip()
+    elif "words" in merged:
+        merged["text"] = " ".join(w.get("word", "").strip() for w in merged["words"]).strip()
+    else:
+        merged["text"] = " ".join(words)
+
+    if parts and "duration" in parts[-1]["transcript"]:
+        merged["duration"] = parts[-1]["offset"] + parts[-1]["transcript"]["duration"]
+
+    return merged
+
+
+def restore_original_timestamps(transcript, offset_map):
+    """
+    Move timestamps of a transcript made from silence-trimmed audio back onto the
+    original audio, using the offset map produced by `silence.plan_silence_trim`.
+    """
+    if len(offset_map) < 2 and not offset_map[0][1]:
+        return transcript  # nothing was trimmed
+
+    restored = dict(transcript)
+    for key in TIMED_KEYS:
+        if key in transcript:
+            restored[key] = [
+                {k: to_original_time(v, offset_map) if k in ("start", "end") else v for k, v in item.items()}
+                for item in transcript[key]
+            ]
+    return restored
+
+
+def _shift_items(items, offset, lower, upper):
+    """Move timestamped items onto the original timeline and keep those owned by this window."""
+    shifted = []
+    for item in items:
+        item = dict(item)
+        for key in ("start", "end"):
+            if key in item:
+                item[key] = round(item[key] + offset, 3)
+        if lower <= item.get("start", lower) < upper:
+            shifted.append(item)
+    return shifted
+
+
+def _normalize(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _append_words(existing, incoming):
+    """
+    Append `incoming` words to `existing`, dropping the words both windows transcribed
+    in their shared overlap. The seam is the longest run of words common to the tail of
+    `existing` and the head of `incoming`, which tolerates words clipped at window edges.
+    """
+    if not existing or not incoming:
+        return existing + incoming
+
+    tail = existing[-OVERLAP_SEARCH_WORDS:]
+    head = incoming[:OVERLAP_SEARCH_WORDS]
+    match = SequenceMatcher(
+        None, [_normalize(w) for w in tail], [_normalize(w) for w in head], autojunk=False
+    ).find_longest_match(0, len(tail), 0, len(head))
+
+    if match.size < MIN_OVERLAP_WORDS:
+        return existing + incoming
+
+    keep = len(existing) - len(tail) + match.a + match.size
+    return existing[:keep] + incoming[match.b + match.size:]
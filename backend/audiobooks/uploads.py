@@ -0,0 +1,89 @@
+"""
+Direct-to-blob uploads of audiobook parts.
+
+Instead of streaming audio through Django, a client opens an upload session and
+receives a short-lived write SAS URL per part. It uploads the part to Azure as
+blocks (Put Block) named by their zero-padded sequence number, base64-encoded,
+e.g. base64("000000"), base64("000001"), ... Fetching the session again lists
+the blocks Azure already holds, with fresh URLs, so an interrupted upload
+resumes where it stopped. Committing the session stitches each part's blocks
+into its blob, in sequence order, on the server.
+"""
+import os
+import uuid
+import mimetypes
+import logging
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobServiceClient, ContentSettings
+
+from .signing import sign
+
+logger = logging.getLogger(__name__)
+
+AZURE_STORAGE_ACCOUNT_NAME = os.environ.get("AZURE_ACCOUNT_NAME")
+AZURE_STORAGE_ACCOUNT_KEY = os.environ.get("AZURE_ACCOUNT_KEY")
+AZURE_CONTAINER_NAME = os.environ.get("AZURE_CONTAINER")
+
+UPLOAD_SAS_EXPIRY_SECONDS = int(os.environ.get("UPLOAD_SAS_EXPIRY_SECONDS", 900))  # re-fetch the session for new URLs
+UPLOAD_BLOCK_SIZE = int(os.environ.get("UPLOAD_BLOCK_SIZE", 8 * 1024 * 1024))  # suggested size of each Put Block
+UPLOAD_BLOCK_ID_DIGITS = 6
+
+
+class UploadError(Exception):
+    """Raised when a part cannot be committed as uploaded."""
+    pass
+
+
+def part_blob_name(audiobook_id, filename):
+    """Blob name for an uploaded part, in the same layout as `models.audio_upload_path`."""
+    return f"{audiobook_id}/audio/{uuid.uuid4()}_{os.path.basename(filename)}"
+
+
+def upload_url(blob_name):
+    """Return (url, expires_at) of a write-only SAS for `blob_name`."""
+    return sign(blob_name, permission="cw", expires_in=UPLOAD_SAS_EXPIRY_SECONDS)  # no read or delete
+
+
+def uploaded_blocks(blob_name):
+    """Decoded ids of the blocks already uploaded (and not yet committed) for `blob_name`, in order."""
+    try:
+        _, uncommitted = _blob_client(blob_name).get_block_list("uncommitted")
+    except ResourceNotFoundError:
+        return []  # no block uploaded yet, so the blob does not exist
+    return sorted(block.id for block in uncommitted)
+
+
+def commit_part(blob_name, filename, expected_size=None):
+    """
+    Commit the uploaded blocks of `blob_name` in sequence order and return the blob size.
+    Raises UploadError when there is nothing to commit, blocks are missing, or the size is wrong.
+    """
+    block_ids = uploaded_blocks(blob_name)
+    if not block_ids:
+        raise UploadError(f"No uploaded blocks for {filename}.")
+    expected_ids = [f"{i:0{UPLOAD_BLOCK_ID_DIGITS}d}" for i in range(len(block_ids))]
+    if block_ids != expected_ids:
+        raise UploadError(f"Blocks of {filename} are not numbered 0..{len(block_ids) - 1} with {UPLOAD_BLOCK_ID_DIGITS} digits.")
+
+    blob_client = _blob_client(blob_name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    blob_client.commit_block_list(block_ids, content_settings=ContentSettings(content_type=content_type))
+
+    size = blob_client.get_blob_properties().size
+    if expected_size is not None and size != expected_size:
+        blob_client.delete_blob()  # a truncated part must be uploaded again, not transcribed
+        raise UploadError(f"Uploaded size of {filename} is {size} bytes, expected {expected_size}.")
+    logger.info(f"Committed {len(block_ids)} block(s), {size} bytes, to {blob_name}")
+    return size
+
+
+def _blob_client(blob_name):
+    if not AZURE_STORAGE_ACCOUNT_KEY or not AZURE_STORAGE_ACCOUNT_NAME:
+        raise ValueError("Azure credentials are not set.")
+
+    blob_service_client = BlobServiceClient(
+        f"https://{AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net",
+        credential=AZURE_STORAGE_ACCOUNT_KEY
+    )
+    return blob_service_client.get_blob_client(container=AZURE_CONTAINER_NAME, blob=blob_name)
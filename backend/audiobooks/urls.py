@@ -8,8 +8,16 @@ router.register(r"audiobooks", AudiobookViewSet, basename="audiobook")
 
 urlpatterns = [
     path('audiobooks/checkout/', AudiobookCheckoutView.as_view(), name='audiobook-checkout'),
+    path("audiobooks/<uuid:audiobook_id>/download/", AudiobookBundleView.as_view(), name="audiobook-download"), # streamed ZIP of audio and transcripts
+    path("audiobooks/<uuid:audiobook_id>/transcript/search/", AudiobookTranscriptSearchView.as_view(), name="audiobook-transcript-search"), # search inside the book
+    path("audiobooks/files/<uuid:file_id>/transcript/", AudiobookFileTranscriptView.as_view(), name="audiobook-file-transcript"), # lazy-loaded reading
+    path("audiobooks/<uuid:audiobook_id>/transcript.json", AudiobookTranscriptJSONView.as_view(), name="audiobook-transcript-json"), # whole-book JSON
+    path("audiobooks/files/<uuid:file_id>/transcript.json", AudiobookFileTranscriptJSONView.as_view(), name="audiobook-file-transcript-json"), # whole or ranged JSON
     path('audiobooks/<uuid:audiobook_id>/transcribe/', AudiobookTranscriptionView.as_view(), name='transcribe-audiobook'), # celery task for transcription
     path("audiobooks/<uuid:audiobook_id>/summarize/", AudiobookSummaryView.as_view(), name="audiobook-summarize"), # celery task for summarization and tagging
+    path("audiobooks/<uuid:audiobook_id>/uploads/", AudiobookUploadSessionView.as_view(), name="audiobook-upload-session"), # direct-to-blob upload
+    path("audiobooks/uploads/<uuid:session_id>/", UploadSessionDetailView.as_view(), name="upload-session-detail"),
+    path("audiobooks/uploads/<uuid:session_id>/commit/", UploadSessionCommitView.as_view(), name="upload-session-commit"),
 
 
     path('', include(router.urls)),
@@ -4,27 +4,95 @@ from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
+from django.db.models import Prefetch
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import content_disposition_header
 
-from datetime import datetime, timedelta
-
-from azure.storage.blob import generate_blob_sas, BlobSasPermissions
 from azure.storage.blob import BlobServiceClient
 
-from .models import Audiobook, AudiobookFile
-from .serializers import AudiobookSerializer
-
-from .tasks import transcribe_audio_file, generate_summary_and_tags
+from .models import Audiobook, AudiobookFile, UploadSession, Tag
+from .serializers import (
+    AudiobookSerializer, AudiobookListSerializer, AudiobookSearchSerializer, TagSerializer, TranscriptPassageSerializer,
+    TranscriptSegmentSerializer, UploadSessionSerializer,
+)
+from .tags import set_tags, tag_slug
+from .pagination import CatalogueCursorPagination, SearchPagination
+from .search import search_catalogue
+from .response_cache import cached_response, catalogue_list_key, audiobook_detail_key, audiobook_query_key
+from .transcript_index import (
+    TRANSCRIPT_PAGE_SIZE, TRANSCRIPT_MAX_PAGE_SIZE, search_transcript, transcript_page, transcript_range,
+)
+from .uploads import UploadError, part_blob_name, commit_part
+from .signing import signed_url
+
+from .tasks import generate_summary_and_tags, start_audiobook_pipeline
+from .content_hash import sha256_chunks
+from .metadata import probe_upload
+from .bundles import audiobook_archive, archive_etag, bundle_token, check_bundle_token, parse_range, safe_filename
+from .transcript_store import iter_transcript, transcript_size
 
 import os
+import uuid
+import hashlib
+from urllib.parse import urlencode
 
 AZURE_STORAGE_ACCOUNT_NAME = os.environ.get("AZURE_ACCOUNT_NAME")
 AZURE_STORAGE_ACCOUNT_KEY = os.environ.get("AZURE_ACCOUNT_KEY")
 AZURE_CONTAINER_NAME = os.environ.get("AZURE_CONTAINER")
+CHECKOUT_URL_EXPIRY_SECONDS = 3600
 
 class AudiobookViewSet(viewsets.ModelViewSet):
-    queryset = Audiobook.objects.all().order_by("-created_at")
+    queryset = Audiobook.objects.all().order_by("-created_at", "-id")
     serializer_class = AudiobookSerializer
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = CatalogueCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset().defer("search_vector")
+        if self.action == "list":
+            for tag in self.request.query_params.getlist("tag"):
+                queryset = queryset.filter(tag_set__slug=tag_slug(tag))  # every given tag, via the join table index
+            return queryset.defer("description")  # slim cards, no files
+        return queryset.prefetch_related(Prefetch("audio_files", queryset=AudiobookFile.objects.order_by("order")))
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return AudiobookListSerializer
+        return AudiobookSerializer
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, catalogue_list_key(request), lambda: super(AudiobookViewSet, self).list(request, *args, **kwargs).data)
+
+    @action(detail=False, methods=["get"])
+    def tags(self, request):
+        """Tag facets with their precomputed book counts, most used first."""
+        def render():
+            tags = Tag.objects.filter(audiobook_count__gt=0).order_by("-audiobook_count", "name")
+            return TagSerializer(tags, many=True).data
+        return cached_response(request, catalogue_list_key(request), render)
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Ranked full-text search over title, author, tags and description: ?q=<terms>&page=<n>."""
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        def render():
+            paginator = SearchPagination()
+            page = paginator.paginate_queryset(search_catalogue(Audiobook.objects.defer("search_vector", "description"), text), request, view=self)
+            return paginator.get_paginated_response(AudiobookSearchSerializer(page, many=True, context=self.get_serializer_context()).data).data
+        return cached_response(request, catalogue_list_key(request), render)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            audiobook_id = uuid.UUID(str(kwargs[self.lookup_field]))
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)  # not a book id, let it 404
+        return cached_response(request, audiobook_detail_key(request, audiobook_id), lambda: super(AudiobookViewSet, self).retrieve(request, *args, **kwargs).data)
 
     def create(self, request, *args, **kwargs):
         title = request.data.get("title")
@@ -33,6 +101,8 @@ class AudiobookViewSet(viewsets.ModelViewSet):
         tags = request.data.get("tags", "")
         price = request.data.get("price")
         cover_image = request.data.get("cover_image")
+        # Only admins may jump the transcription queue
+        high_priority = getattr(request.user, "role", None) == "admin" and str(request.data.get("high_priority", "")).lower() in ("true", "1")
 
         if not all([title, author, price, cover_image]):
             return Response({"detail": "Missing required fields."}, status=status.HTTP_400_BAD_REQUEST)
@@ -41,26 +111,35 @@ class AudiobookViewSet(viewsets.ModelViewSet):
             title=title,
             author=author,
             description=description,
-            tags=tags,
             price=price,
             cover_image=cover_image,
+            high_priority=high_priority,
         )
+        set_tags(audiobook, tags)
 
         audio_files = request.FILES.getlist("audio_files")
         audio_orders = request.data.getlist("audio_orders")
 
-        created_files = []
         for i, file in enumerate(audio_files):
             order = int(audio_orders[i]) if i < len(audio_orders) else i
-            af = AudiobookFile.objects.create(audiobook=audiobook, file=file, order=order)
-            created_files.append(af)
+            AudiobookFile.objects.create(
+                audiobook=audiobook, file=file, order=order, content_hash=sha256_chunks(file.chunks()),
+                **probe_upload(file),
+            )
 
-        for af in created_files:
-            transcribe_audio_file.delay(str(af.id))
+        # Transcribe all parts, then aggregate and summarize once every part is done.
+        # Without parts the audio arrives through an upload session, whose commit starts processing.
+        if audio_files:
+            start_audiobook_pipeline(audiobook)
 
         serializer = self.get_serializer(audiobook)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def perform_update(self, serializer):
+        audiobook = serializer.save()
+        if "tags" in serializer.validated_data:
+            set_tags(audiobook, audiobook.tags)  # normalize and keep tag_set and facet counts in step
+
     def destroy(self, request, *args, **kwargs):
 
         if getattr(request.user, "role", None) != "admin":
@@ -74,6 +153,9 @@ class AudiobookViewSet(viewsets.ModelViewSet):
             if file_obj.transcription_file:
                 self.delete_blob(file_obj.transcription_file.name)
 
+        if audiobook.transcription_file:
+            self.delete_blob(audiobook.transcription_file.name)
+
         # Delete cover image if exists
         if audiobook.cover_image:
             self.delete_blob(audiobook.cover_image.name)
@@ -114,8 +196,13 @@ class AudiobookCheckoutView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            audiobooks = Audiobook.objects.filter(id__in=item_ids)
-            if audiobooks.count() != len(item_ids):
+            # Two queries in total: the audiobooks, and all of their files in reading order
+            audiobooks = list(
+                Audiobook.objects.filter(id__in=item_ids).prefetch_related(
+                    Prefetch("audio_files", queryset=AudiobookFile.objects.order_by("order"))
+                )
+            )
+            if len(audiobooks) != len(set(map(str, item_ids))):
                 return Response(
                     {"error": "One or more audiobooks not found."},
                     status=status.HTTP_404_NOT_FOUND,
@@ -127,7 +214,7 @@ class AudiobookCheckoutView(APIView):
                 audio_urls = []
                 file_transcriptions = []
 
-                for file_obj in audiobook.audio_files.all().order_by("order"):
+                for file_obj in audiobook.audio_files.all():
                     audio_urls.append({
                         "url": self.get_blob_sas_url(file_obj.file.name),
                         "order": file_obj.order,
@@ -135,7 +222,8 @@ class AudiobookCheckoutView(APIView):
                     if file_obj.transcription_file:
                         file_transcriptions.append({
                             "file_id": str(file_obj.id),
-                            "url": self.get_blob_sas_url(file_obj.transcription_file.name),
+                            "url": self.get_transcript_sas_url(file_obj)
+                            if file_obj.transcription_index else self.get_blob_sas_url(file_obj.transcription_file.name),
                             "order": file_obj.order,
                         })
 
@@ -145,6 +233,10 @@ class AudiobookCheckoutView(APIView):
                     "cover_image": audiobook.cover_image.url if audiobook.cover_image else None,
                     "audio_urls": audio_urls,
                     "transcription_urls": file_transcriptions,  # only individual file transcriptions
+                    # The whole book as one streamed ZIP, fetchable by a plain browser download
+                    "download_url": request.build_absolute_uri(
+                        f"{reverse('audiobook-download', args=[audiobook.id])}?{urlencode({'token': bundle_token(audiobook.id)})}"
+                    ),
                 })
 
             return Response({
@@ -159,26 +251,173 @@ class AudiobookCheckoutView(APIView):
             )
 
     def get_blob_sas_url(self, blob_name: str) -> str:
-        if not AZURE_STORAGE_ACCOUNT_KEY or not AZURE_STORAGE_ACCOUNT_NAME:
-            raise ValueError("Azure credentials are not set.")
-
-        sas_token = generate_blob_sas(
-            account_name=AZURE_STORAGE_ACCOUNT_NAME,
-            container_name=AZURE_CONTAINER_NAME,
-            blob_name=blob_name,
-            account_key=AZURE_STORAGE_ACCOUNT_KEY,
-            permission=BlobSasPermissions(read=True),
-            expiry=datetime.utcnow() + timedelta(hours=1)
+        return signed_url(blob_name, expires_in=CHECKOUT_URL_EXPIRY_SECONDS)
+
+    def get_transcript_sas_url(self, file_obj) -> str:
+        # Storage serves the compressed blob as gzip-encoded JSON, which the browser inflates itself
+        return signed_url(
+            file_obj.transcription_file.name, expires_in=CHECKOUT_URL_EXPIRY_SECONDS,
+            content_type="application/json", content_encoding="gzip",
+            content_disposition=f'attachment; filename="{file_obj.id}_transcription.json"',
         )
-        return f"https://{AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{AZURE_CONTAINER_NAME}/{blob_name}?{sas_token}"
-    
 
-    
+
+class AudiobookBundleView(APIView):
+    """
+    Download an audiobook as one ZIP of its audio parts and transcripts.
+    Blobs are streamed through as stored entries, so server memory stays flat and nothing
+    touches disk. A single byte Range (guarded by If-Range) resumes an interrupted download.
+    Browsers follow the signed link from checkout (?token=), so it also works without a login header.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, audiobook_id):
+        if not request.user.is_authenticated and not check_bundle_token(request.query_params.get("token", ""), audiobook_id):
+            return Response({"error": "Download link is invalid or has expired."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            audiobook = Audiobook.objects.prefetch_related(
+                Prefetch("audio_files", queryset=AudiobookFile.objects.order_by("order"))
+            ).get(id=audiobook_id)
+        except Audiobook.DoesNotExist:
+            return Response({"error": "Audiobook not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        archive = audiobook_archive(audiobook)
+        filename = safe_filename(audiobook.title) or str(audiobook.id)
+        return ranged_response(request, archive.size, archive_etag(archive), archive.iter_range, "application/zip", f"{filename}.zip")
+
+
+def ranged_response(request, size, etag, iter_range, content_type, filename):
+    """
+    Stream `iter_range(start, end)` as a download of `size` bytes, honouring a single byte
+    Range (guarded by If-Range) with a 206, or a 416 when it cannot be satisfied.
+    """
+    if_range = request.headers.get("If-Range")
+    byte_range = parse_range(request.headers.get("Range"), size) if if_range in (None, etag) else None
+    if byte_range is False:
+        response = Response({"error": "Requested range not satisfiable."}, status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range or (0, size)
+    response = StreamingHttpResponse(iter_range(start, end), content_type=content_type)
+    if byte_range:
+        response.status_code = status.HTTP_206_PARTIAL_CONTENT
+        response["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    response["Content-Length"] = str(end - start)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    return response
+
+
+class AudiobookTranscriptSearchView(APIView):
+    """
+    Search inside an audiobook: matching transcript passages in reading order, with the part
+    and the second each starts at, so a player can jump straight there. ?q=<terms>&page=<n>
+    """
+    def get(self, request, audiobook_id):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not Audiobook.objects.filter(id=audiobook_id).exists():
+            return Response({"error": "Audiobook not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        def render():
+            paginator = SearchPagination()
+            page = paginator.paginate_queryset(search_transcript(audiobook_id, text), request, view=self)
+            return paginator.get_paginated_response(TranscriptSegmentSerializer(page, many=True).data).data
+        return cached_response(request, audiobook_query_key(request, audiobook_id, "search"), render)
+
+
+class AudiobookFileTranscriptView(APIView):
+    """
+    Read a part's transcript a little at a time, from the indexed passages rather than the JSON blob.
+    ?page=<n>&page_size=<n> pages by passage, ?from=<seconds>&to=<seconds> returns what is heard
+    in that span. `count` is the part's total number of passages, so readers can lazy-load.
+    """
+    def get(self, request, file_id):
+        try:
+            file_obj = AudiobookFile.objects.only("id", "audiobook_id", "transcript_segment_count").get(id=file_id)
+        except AudiobookFile.DoesNotExist:
+            return Response({"error": "Audiobook file not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        params = request.query_params
+        try:
+            size = min(max(int(params.get("page_size", TRANSCRIPT_PAGE_SIZE)), 1), TRANSCRIPT_MAX_PAGE_SIZE)
+            page = int(params.get("page", 1))
+            start = float(params.get("from", 0))
+            end = float(params.get("to", "inf"))
+        except ValueError:
+            return Response({"error": "'page' and 'page_size' must be integers, 'from' and 'to' seconds."}, status=status.HTTP_400_BAD_REQUEST)
+        if page < 1 or start < 0 or end <= start:
+            return Response({"error": "'page' must be at least 1 and 'to' after 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        def render():
+            count = file_obj.transcript_segment_count
+            if "from" in params or "to" in params:
+                passages = list(transcript_range(file_obj, start, end)[:size + 1])
+                # A span longer than one page continues from the first passage left out
+                next_link = self._link(request, {"from": passages[size].start}) if len(passages) > size else None
+                previous_link = None
+            else:
+                passages = list(transcript_page(file_obj, (page - 1) * size, size))
+                next_link = self._link(request, {"page": page + 1}) if page * size < count else None
+                previous_link = self._link(request, {"page": page - 1}) if page > 1 else None
+            return {
+                "count": count,
+                "next": next_link,
+                "previous": previous_link,
+                "results": TranscriptPassageSerializer(passages[:size], many=True).data,
+            }
+        return cached_response(request, audiobook_query_key(request, file_obj.audiobook_id, f"transcript:{file_obj.id}"), render)
+
+    def _link(self, request, changes):
+        params = request.query_params.copy()
+        for key, value in changes.items():
+            params[key] = value
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+class AudiobookFileTranscriptJSONView(APIView):
+    """
+    A part's transcript as plain JSON, whichever format its blob is stored in. Compressed
+    transcripts are unpacked on the way out, and a byte Range only decompresses the frames
+    it covers; plain blobs written before compression are redirected to.
+    """
+    def get(self, request, file_id):
+        return transcript_json_response(request, AudiobookFile, file_id, "Audiobook file not found")
+
+
+class AudiobookTranscriptJSONView(APIView):
+    """The whole-book transcript as plain JSON, served like a part's (see AudiobookFileTranscriptJSONView)."""
+    def get(self, request, audiobook_id):
+        return transcript_json_response(request, Audiobook, audiobook_id, "Audiobook not found")
+
+
+def transcript_json_response(request, model, pk, not_found):
+    try:
+        obj = model.objects.only("id", "transcription_file", "transcription_index").get(id=pk)
+    except model.DoesNotExist:
+        return Response({"error": not_found}, status=status.HTTP_404_NOT_FOUND)
+    if not obj.transcription_file:
+        return Response({"error": "Transcript not found"}, status=status.HTTP_404_NOT_FOUND)
+    if not obj.transcription_index:
+        return HttpResponseRedirect(obj.transcription_file.url)
+
+    etag = f'"{hashlib.sha256(obj.transcription_file.name.encode("utf-8")).hexdigest()[:32]}"'  # blob names are unique
+    return ranged_response(
+        request, transcript_size(obj), etag, lambda start, end: iter_transcript(obj, start, end),
+        "application/json", f"{obj.id}_transcription.json",
+    )
+
+
 class AudiobookTranscriptionView(APIView):
     """
-    Trigger transcription for all audio files of a given audiobook
+    Trigger transcription for all audio files of a given audiobook.
+    Cached transcriptions of identical audio are reused unless `force` is sent as true.
     """
     def post(self, request, audiobook_id):
+        force = str(request.data.get("force", "")).lower() in ("true", "1")
         try:
             audiobook = Audiobook.objects.get(id=audiobook_id)
             print(f"Found audiobook: {audiobook.title}")
@@ -186,13 +425,7 @@ class AudiobookTranscriptionView(APIView):
         except Audiobook.DoesNotExist:
             return Response({"error": "Audiobook not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        print("Starting for loop")
-        print(audiobook.audio_files.all())
-        for file_obj in audiobook.audio_files.all():
-            print(file_obj)
-            print(f"Transcribing file")
-            print(file_obj.id)
-            transcribe_audio_file.delay(str(file_obj.id))  # Run async with Celery
+        start_audiobook_pipeline(audiobook, force=force)  # Run async with Celery
 
         return Response({"message": "Transcription tasks queued."}, status=status.HTTP_202_ACCEPTED)
     
@@ -214,4 +447,99 @@ class AudiobookSummaryView(APIView):
         return Response(
             {"message": "Summary and tags generation task queued."},
             status=status.HTTP_202_ACCEPTED
-        )
\ No newline at end of file
+        )
+
+
+class AudiobookUploadSessionView(APIView):
+    """
+    Open a direct-to-blob upload session for the audio parts of an audiobook.
+    Expects {"parts": [{"filename", "order", "size"}, ...]} and returns a short-lived
+    write SAS URL per part; the block protocol is described in uploads.py.
+    """
+    def post(self, request, audiobook_id):
+        if getattr(request.user, "role", None) != "admin":
+            raise PermissionDenied("You do not have permission to upload audio.")
+
+        try:
+            audiobook = Audiobook.objects.get(id=audiobook_id)
+        except Audiobook.DoesNotExist:
+            return Response({"error": "Audiobook not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        parts = request.data.get("parts")
+        if not isinstance(parts, list) or not parts or not all(isinstance(p, dict) and p.get("filename") for p in parts):
+            return Response(
+                {"error": "Invalid request body. 'parts' list with a 'filename' for each part is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            session_parts = [
+                {
+                    "index": i,
+                    "filename": part["filename"],
+                    "order": int(part.get("order", i)),
+                    "size": int(part["size"]) if part.get("size") is not None else None,
+                    "blob_name": part_blob_name(audiobook.id, part["filename"]),
+                    "committed": False,
+                }
+                for i, part in enumerate(parts)
+            ]
+        except (TypeError, ValueError):
+            return Response({"error": "'order' and 'size' must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = UploadSession.objects.create(audiobook=audiobook, parts=session_parts)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """
+    Resume an upload session: fresh write SAS URLs plus the blocks already uploaded for each part.
+    """
+    def get(self, request, session_id):
+        if getattr(request.user, "role", None) != "admin":
+            raise PermissionDenied("You do not have permission to upload audio.")
+
+        try:
+            session = UploadSession.objects.get(id=session_id)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(UploadSessionSerializer(session, context={"include_blocks": True}).data)
+
+
+class UploadSessionCommitView(APIView):
+    """
+    Commit the uploaded blocks of every part, create the AudiobookFile rows and start processing.
+    Parts committed by an earlier, partly failed call are not committed again.
+    """
+    def post(self, request, session_id):
+        if getattr(request.user, "role", None) != "admin":
+            raise PermissionDenied("You do not have permission to upload audio.")
+
+        try:
+            session = UploadSession.objects.select_related("audiobook").get(id=session_id)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload session not found"}, status=status.HTTP_404_NOT_FOUND)
+        if session.status == 'COMMITTED':
+            return Response({"error": "Upload session is already committed."}, status=status.HTTP_400_BAD_REQUEST)
+
+        for part in session.parts:
+            if part["committed"]:
+                continue
+            try:
+                commit_part(part["blob_name"], part["filename"], part["size"])
+            except UploadError as e:
+                return Response({"error": str(e), "index": part["index"]}, status=status.HTTP_400_BAD_REQUEST)
+
+            # The blob is already in place, so the row only references it; header metadata
+            # and the content hash are filled in when the part is first processed.
+            AudiobookFile.objects.create(audiobook=session.audiobook, file=part["blob_name"], order=part["order"])
+            part["committed"] = True
+            session.save(update_fields=["parts"])
+
+        session.status = 'COMMITTED'
+        session.save(update_fields=["status"])
+
+        start_audiobook_pipeline(session.audiobook)
+
+        return Response(AudiobookSerializer(session.audiobook, context={"request": request}).data, status=status.HTTP_200_OK)
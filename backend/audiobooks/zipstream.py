@@ -0,0 +1,158 @@
+"""
+Streaming ZIP archives built from blobs, without temp files.
+
+Entries are stored, not compressed (audio is compressed already), so the size
+and layout of the whole archive are known before any data is read. The download
+gets a Content-Length, and any byte range of the archive can be produced on its
+own, which makes the download resumable. Blob data is pulled and sent one chunk
+at a time. CRC-32s are computed on the way and written in a data descriptor
+after each entry. They are also cached, so a resumed download does not re-read
+the entries before the requested range.
+"""
+import zlib
+import struct
+
+from django.core.cache import cache
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_FLAGS = 0x08 | 0x800  # CRC in a data descriptor after the data, UTF-8 names
+ZIP_CRC_CACHE_SECONDS = 30 * 24 * 3600  # blobs are immutable, their CRC never changes
+
+
+class ZipEntry:
+    """
+    One stored file of the archive. `read(offset)` yields the file's bytes from `offset`
+    to the end; `cache_key` identifies the content for the CRC cache.
+    """
+
+    def __init__(self, name, size, modified, read, cache_key):
+        self.name = name
+        self.size = size
+        self.modified = modified
+        self.read = read
+        self.cache_key = f"zip-crc:{cache_key}"
+        self.crc = None
+        self.offset = 0
+        self.zip64 = False
+
+
+class ZipArchive:
+    """A ZIP archive of `entries` that can be streamed in full or as a byte range."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        cached = cache.get_many([entry.cache_key for entry in entries])
+
+        offset = 0
+        for entry in entries:
+            entry.crc = cached.get(entry.cache_key)
+            entry.offset = offset
+            entry.zip64 = entry.size >= ZIP64_LIMIT or offset >= ZIP64_LIMIT
+            offset += len(_local_header(entry)) + entry.size + len(_data_descriptor(entry))
+
+        self.central_offset = offset
+        self.central_size = sum(len(_central_header(entry)) for entry in entries)
+        self.size = self.central_offset + self.central_size + len(self._end_records())
+
+    def iter_range(self, start=0, end=None):
+        """Yield the bytes of the archive from `start` up to (not including) `end`."""
+        end = self.size if end is None else end
+        needs_all_crcs = self.central_offset < end
+
+        for entry in self.entries:
+            header = _local_header(entry)
+            data_start = entry.offset + len(header)
+            data_end = data_start + entry.size
+            descriptor_end = data_end + len(_data_descriptor(entry))
+            needs_crc = needs_all_crcs or (data_end < end and descriptor_end > start)
+
+            yield from _clip(header, entry.offset, start, end)
+            if data_start < end and data_end > start:
+                yield from self._entry_data(entry, max(start - data_start, 0), min(end, data_end) - data_start, needs_crc)
+            elif needs_crc and entry.crc is None:
+                for _ in self._entry_data(entry, 0, 0, True):
+                    pass  # read only to learn the CRC of a part before the range
+            if needs_crc:
+                yield from _clip(_data_descriptor(entry), data_end, start, end)
+
+        if needs_all_crcs:
+            central = b"".join(_central_header(entry) for entry in self.entries) + self._end_records()
+            yield from _clip(central, self.central_offset, start, end)
+
+    def _entry_data(self, entry, skip, stop, needs_crc):
+        """Yield bytes `skip`..`stop` of the entry, reading all of it when its CRC is still unknown."""
+        compute_crc = needs_crc and entry.crc is None
+        position = 0 if compute_crc else skip
+        crc = 0
+        for chunk in entry.read(position):
+            if compute_crc:
+                crc = zlib.crc32(chunk, crc)
+            chunk_end = position + len(chunk)
+            if chunk_end > skip and position < stop:
+                yield chunk[max(skip - position, 0):min(stop, chunk_end) - position]
+            position = chunk_end
+            if position >= stop and not compute_crc:
+                break
+
+        if position < (entry.size if compute_crc else stop):
+            raise IOError(f"{entry.name} ended after {position} of {entry.size} bytes")
+        if compute_crc:
+            entry.crc = crc
+            cache.set(entry.cache_key, crc, ZIP_CRC_CACHE_SECONDS)
+
+    def _end_records(self):
+        count = len(self.entries)
+        records = b""
+        if count >= 0xFFFF or self.central_offset >= ZIP64_LIMIT or self.central_size >= ZIP64_LIMIT:
+            zip64_end_offset = self.central_offset + self.central_size
+            records += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0,
+                                   count, count, self.central_size, self.central_offset)
+            records += struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1)
+        records += struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                               min(self.central_size, ZIP64_LIMIT), min(self.central_offset, ZIP64_LIMIT), 0)
+        return records
+
+
+def _clip(data, offset, start, end):
+    """Yield the part of `data` (placed at `offset` in the archive) inside start..end."""
+    if offset < end and offset + len(data) > start:
+        yield data[max(start - offset, 0):min(end, offset + len(data)) - offset]
+
+
+def _dos_timestamp(dt):
+    if dt.year < 1980:
+        return 0, (1 << 5) | 1  # ZIP cannot express earlier dates
+    return (dt.hour << 11) | (dt.minute << 5) | (dt.second // 2), ((dt.year - 1980) << 9) | (dt.month << 5) | dt.day
+
+
+def _local_header(entry):
+    name = entry.name.encode("utf-8")
+    time, date = _dos_timestamp(entry.modified)
+    if entry.zip64:
+        extra = struct.pack("<HHQQ", 1, 16, entry.size, entry.size)
+        size = ZIP64_LIMIT
+    else:
+        extra = b""
+        size = entry.size
+    return struct.pack("<IHHHHHIIIHH", 0x04034B50, 45 if entry.zip64 else 20, ZIP_FLAGS, 0, time, date,
+                       0, size, size, len(name), len(extra)) + name + extra
+
+
+def _data_descriptor(entry):
+    crc = entry.crc or 0
+    if entry.zip64:
+        return struct.pack("<IIQQ", 0x08074B50, crc, entry.size, entry.size)
+    return struct.pack("<IIII", 0x08074B50, crc, entry.size, entry.size)
+
+
+def _central_header(entry):
+    name = entry.name.encode("utf-8")
+    time, date = _dos_timestamp(entry.modified)
+    if entry.zip64:
+        extra = struct.pack("<HHQQQ", 1, 24, entry.size, entry.size, entry.offset)
+        size, offset = ZIP64_LIMIT, ZIP64_LIMIT
+    else:
+        extra = b""
+        size, offset = entry.size, entry.offset
+    return struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 45, 45 if entry.zip64 else 20, ZIP_FLAGS, 0, time, date,
+                       entry.crc or 0, size, size, len(name), len(extra), 0, 0, 0, 0, offset) + name + extra
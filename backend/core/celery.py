@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from kombu import Queue
 
 # Set default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
@@ -8,4 +9,12 @@ app = Celery('core')
 
 # Load task modules from all registered Django apps
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# Stage queues (routing lives in CELERY_TASK_ROUTES). Run one worker pool per queue:
+#   celery -A core worker -Q audio -P prefork                  # CPU: pydub/ffmpeg, concurrency defaults to cores
+#   celery -A core worker -Q network -P threads -c 32          # I/O: Azure AI and blob calls
+app.conf.task_queues = (
+    Queue('audio'),
+    Queue('network'),
+)
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     
     # 3rd Party Apps
     'rest_framework',
@@ -81,6 +82,14 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Response cache for catalogue reads (see audiobooks/response_cache.py), on its own Redis database
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("CACHE_REDIS_URL", "redis://redis:6379/1"),
+    }
+}
+
 CELERY_BROKER_URL = 'redis://redis:6379/0'
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
@@ -88,6 +97,23 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Fair-share scheduling: Redis keeps one list per priority (0 = most urgent) and workers
+# take one task at a time, so a queued task's priority is honoured (see audiobooks/scheduling.py)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Stage routing: CPU-bound decoding/encoding runs on the 'audio' queue (prefork pool sized to cores),
+# everything that mostly waits on Azure runs on the 'network' queue (threaded pool, high concurrency).
+# Queues and their worker pools are declared in core/celery.py.
+CELERY_TASK_DEFAULT_QUEUE = 'network'
+CELERY_TASK_ROUTES = {
+    'audiobooks.tasks.transcribe_audio_file': {'queue': 'audio'},
+}
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
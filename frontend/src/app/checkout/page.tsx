@@ -4,7 +4,6 @@ import { useState, useEffect } from 'react';
 import Image from 'next/image';
 import Link from 'next/link';
 import Navbar from '../components/Navbar';
-import JSZip from 'jszip'; // client side zipper for download all button
 
 interface DownloadLink {
   id: string;
@@ -29,6 +28,7 @@ interface GroupedDownloadLink {
   title: string;
   author: string;
   cover_image: string;
+  download_url: string; // signed, streamed ZIP of the whole audiobook
   files: {
     audio?: { title: string; url: string; order?: number };
     transcription?: { title: string; url: string; order?: number };
@@ -41,7 +41,6 @@ export default function CheckoutPage() {
   const [isProcessing, setIsProcessing] = useState(false);
   const [isOrderConfirmed, setIsOrderConfirmed] = useState(false);
   const [groupedDownloadLinks, setGroupedDownloadLinks] = useState<GroupedDownloadLink[]>([]);
-  const [isZipping, setIsZipping] = useState<string | null>(null);
   const API_URL = process.env.NEXT_PUBLIC_API_URL;
 
   useEffect(() => {
@@ -154,49 +153,6 @@ const handleCheckout = async () => {
     }
   };
 
-  const handleZipDownload = async (audiobook: GroupedDownloadLink) => {
-    setIsZipping(audiobook.id);
-    const zip = new JSZip();
-    const folder = zip.folder(audiobook.title.replace(/[\s\W]+/g, '_'));
-
-    const filePromises = audiobook.files.flatMap(fileGroup => {
-      const promises = [];
-      if (fileGroup.audio) {
-        promises.push(
-          fetch(fileGroup.audio.url)
-            .then(res => res.blob())
-            .then(blob => folder.file(`${fileGroup.audio.title.replace(/\s+/g, '_')}.mp3`, blob))
-        );
-      }
-      if (fileGroup.transcription) {
-        promises.push(
-          fetch(fileGroup.transcription.url)
-            .then(res => res.blob())
-            .then(blob => folder.file(`${fileGroup.transcription.title.replace(/\s+/g, '_')}.txt`, blob))
-        );
-      }
-      return promises;
-    });
-
-    try {
-      await Promise.all(filePromises);
-      const content = await zip.generateAsync({ type: 'blob' });
-      const blobUrl = window.URL.createObjectURL(content);
-      const a = document.createElement('a');
-      a.href = blobUrl;
-      a.download = `${audiobook.title.replace(/\s+/g, '_')}.zip`;
-      document.body.appendChild(a);
-      a.click();
-      a.remove();
-      window.URL.revokeObjectURL(blobUrl);
-    } catch (error) {
-      console.error('Zipping failed:', error);
-      alert('Failed to create and download the ZIP file.');
-    } finally {
-      setIsZipping(null);
-    }
-  };
-
   if (isOrderConfirmed) {
     return (
       <div className="min-h-screen bg-gray-100 p-8 flex flex-col items-center justify-center text-center">
@@ -221,15 +177,13 @@ const handleCheckout = async () => {
                 </div>
                 
                 <div className="flex justify-end mb-4">
-                  <button
-                    onClick={() => handleZipDownload(audiobook)}
-                    disabled={isZipping === audiobook.id}
-                    className={`px-4 py-2 rounded-lg transition-colors text-sm font-semibold ${
-                      isZipping === audiobook.id ? 'bg-gray-400 text-white cursor-not-allowed' : 'bg-green-600 text-white hover:bg-green-700'
-                    }`}
+                  {/* Streamed by the server, so the browser saves it to disk instead of zipping in memory */}
+                  <a
+                    href={audiobook.download_url}
+                    className="px-4 py-2 rounded-lg transition-colors text-sm font-semibold bg-green-600 text-white hover:bg-green-700"
                   >
-                    {isZipping === audiobook.id ? 'Zipping...' : 'Download All (.zip)'}
-                  </button>
+                    Download All (.zip)
+                  </a>
                 </div>
 
                 <div className="space-y-4 pl-4">
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, FormEvent } from 'react';
 import Image from 'next/image';
 import Link from 'next/link';
 import { useRouter } from 'next/navigation';
@@ -26,6 +26,8 @@ interface Audiobook {
 
 export default function HomePage() {
   const [audiobooks, setAudiobooks] = useState<Audiobook[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [query, setQuery] = useState('');
   const [cart, setCart] = useState<Audiobook[]>([]);
   const [isCheckingAuth, setIsCheckingAuth] = useState(true);
   const [isLoggedIn, setIsLoggedIn] = useState(false);
@@ -50,34 +52,44 @@ export default function HomePage() {
       setCart(JSON.parse(savedCart));
     }
 
-    const fetchAudiobooks = async () => {
-      try {
-        const response = await fetch(`${API_URL}/audiobooks/`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
+    fetchAudiobooks(`${API_URL}/audiobooks/`);
+    setIsCheckingAuth(false);
+  }, [router]);
 
-        if (response.status === 401) {
-          localStorage.removeItem('access_token');
-          localStorage.removeItem('refresh_token');
-          setIsLoggedIn(false);
-          router.replace('/login'); // redirect immediately
-          return;
-        }
+  // The catalogue comes in cursor-paginated pages; `next` is the URL of the following page
+  const fetchAudiobooks = async (url: string, append = false) => {
+    const token = localStorage.getItem('access_token');
+    try {
+      const response = await fetch(url, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
 
-        else if (!response.ok) {
-          throw new Error(`Error fetching audiobooks: ${response.statusText}`);
-        }
+      if (response.status === 401) {
+        localStorage.removeItem('access_token');
+        localStorage.removeItem('refresh_token');
+        setIsLoggedIn(false);
+        router.replace('/login'); // redirect immediately
+        return;
+      }
 
-        const data = await response.json();
-        setAudiobooks(data);
-      } catch (error) {
-        console.error('Failed to fetch audiobooks:', error);
+      else if (!response.ok) {
+        throw new Error(`Error fetching audiobooks: ${response.statusText}`);
       }
-    };
 
-    fetchAudiobooks();
-    setIsCheckingAuth(false);
-  }, [router]);
+      const data = await response.json();
+      setAudiobooks((prev) => (append ? [...prev, ...data.results] : data.results));
+      setNextPage(data.next);
+    } catch (error) {
+      console.error('Failed to fetch audiobooks:', error);
+    }
+  };
+
+  // Search runs on the server; an empty query goes back to the full catalogue
+  const handleSearch = (e: FormEvent) => {
+    e.preventDefault();
+    const q = query.trim();
+    fetchAudiobooks(q ? `${API_URL}/audiobooks/search/?q=${encodeURIComponent(q)}` : `${API_URL}/audiobooks/`);
+  };
 
   const addToCart = (book: Audiobook) => {
     setCart((prevCart) => {
@@ -189,6 +201,18 @@ export default function HomePage() {
       {/* Main Content */}
       <main className="container mx-auto">
         <h2 className="text-3xl font-bold mb-6 text-gray-800">Popular Audiobooks</h2>
+        <form onSubmit={handleSearch} className="flex gap-2 mb-6">
+          <input
+            type="search"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            placeholder="Search by title, author, tag or description"
+            className="flex-1 px-4 py-2 rounded-lg border border-gray-300 text-gray-900"
+          />
+          <button type="submit" className="px-6 py-2 rounded-lg bg-blue-600 text-white hover:bg-blue-700 transition-colors">
+            Search
+          </button>
+        </form>
         <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-8">
           {audiobooks.map((book) => (
             <div
@@ -214,12 +238,13 @@ export default function HomePage() {
               <div className="flex flex-wrap justify-center gap-2 mt-2">
                 {book.tags && book.tags.trim() !== "" ? (
                   book.tags.split(',').map((tag) => (
-                    <span
+                    <button
                       key={tag}
-                      className="text-xs font-medium bg-gray-200 text-gray-700 px-2 py-1 rounded-full"
+                      onClick={() => fetchAudiobooks(`${API_URL}/audiobooks/?tag=${encodeURIComponent(tag.trim())}`)}
+                      className="text-xs font-medium bg-gray-200 text-gray-700 px-2 py-1 rounded-full hover:bg-gray-300"
                     >
                       {tag.trim()}
-                    </span>
+                    </button>
                   ))
                 ) : (
                   <span className="text-xs font-medium text-gray-500">Generating tags...</span>
@@ -249,6 +274,16 @@ export default function HomePage() {
             </div>
           ))}
         </div>
+        {nextPage && (
+          <div className="flex justify-center mt-8">
+            <button
+              onClick={() => fetchAudiobooks(nextPage, true)}
+              className="px-6 py-2 rounded-lg bg-blue-600 text-white hover:bg-blue-700 transition-colors"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </main>
 
       {/* Shopping Cart */}